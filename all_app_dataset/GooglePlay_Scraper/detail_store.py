@@ -0,0 +1,135 @@
+import json
+import os
+import sys
+import threading
+
+# ======================================================
+# Google Play 详情增量存储
+# - app_details.jsonl     : 追加写，每行一个 app 详情
+# - app_details.jsonl.idx : 追加写，每行 "appId \t offset \t length"
+# 抓取前先查索引，已有的不再请求；随机读取单个 app 只需 seek 一次
+# 同一 appId 写多次时以最后一次为准
+# ======================================================
+
+STORE_FILE = "app_details.jsonl"
+
+# 旧版整文件 JSON（同一字段格式），可一次性导入
+LEGACY_JSON_FILES = ["app_details.json", "app_details2.json"]
+
+
+class DetailStore:
+
+    def __init__(self, path=STORE_FILE, index_path=None):
+        self.path = path
+        self.index_path = index_path or path + ".idx"
+        self.index = {}          # appId -> (offset, length)
+        self._lock = threading.Lock()
+        self._load_index()
+
+    # ---------- 索引 ----------
+    def _load_index(self):
+        indexed_end = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 3:
+                        continue   # 崩溃时写了一半的索引行
+                    app_id, offset, length = parts[0], int(parts[1]), int(parts[2])
+                    self.index[app_id] = (offset, length)
+                    indexed_end = max(indexed_end, offset + length)
+
+        # 数据文件比索引长：补扫尾部未建索引的记录
+        if os.path.exists(self.path) and os.path.getsize(self.path) > indexed_end:
+            self._reindex_from(indexed_end)
+
+    def _reindex_from(self, offset):
+        added = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                try:
+                    record = json.loads(raw)
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    break      # 写了一半的最后一行，后续 put 前截掉
+                app_id = record.get("appId")
+                if app_id:
+                    self.index[app_id] = (offset, len(raw))
+                    added.append((app_id, offset, len(raw)))
+                offset += len(raw)
+
+        if offset < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            for app_id, off, length in added:
+                f.write(f"{app_id}\t{off}\t{length}\n")
+
+    # ---------- 读 ----------
+    def __contains__(self, app_id):
+        return app_id in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def ids(self):
+        return list(self.index)
+
+    def get(self, app_id):
+        """随机读取单个 app，不存在返回 None"""
+        pos = self.index.get(app_id)
+        if pos is None:
+            return None
+        offset, length = pos
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def iter_records(self):
+        """按索引（最新版本）遍历全部记录"""
+        with open(self.path, "rb") as f:
+            for offset, length in self.index.values():
+                f.seek(offset)
+                yield json.loads(f.read(length))
+
+    # ---------- 写 ----------
+    def put(self, record):
+        app_id = record.get("appId")
+        if not app_id:
+            raise ValueError("record has no appId")
+        data = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+        with self._lock:
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(data)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(f"{app_id}\t{offset}\t{len(data)}\n")
+            self.index[app_id] = (offset, len(data))
+
+
+def import_legacy(store, paths=LEGACY_JSON_FILES):
+    """把旧版整文件 JSON 中抓取成功的记录导入 store（已存在的跳过）"""
+    imported = 0
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            records = json.load(f)
+        for record in records if isinstance(records, list) else [records]:
+            if not isinstance(record, dict) or "error" in record:
+                continue
+            app_id = record.get("appId")
+            if app_id and app_id not in store:
+                record = {k: v for k, v in record.items() if k != "csv_title"}
+                store.put(record)
+                imported += 1
+    return imported
+
+
+if __name__ == "__main__":
+    store = DetailStore()
+    paths = sys.argv[1:] or LEGACY_JSON_FILES
+    n = import_legacy(store, paths)
+    print(f"[INFO] Imported {n} records, store now holds {len(store)} apps ({STORE_FILE})")
@@ -0,0 +1,155 @@
+import os
+import re
+import sys
+import threading
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from google_play_scraper import app
+from google_play_scraper.exceptions import ExtraHTTPError, NotFoundError
+
+# 复用上级目录的令牌桶 / 重试策略 / 录制回放
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from http_replay import HTTP_REPLAY  # noqa: E402
+from rate_limit import TokenBucket  # noqa: E402
+from retry import RetryPolicy, classify_error  # noqa: E402
+
+# ======================================================
+# Google Play 详情抓取引擎（googleplay.py / googleplay_input_json.py 共用）
+# - 有界线程池并发抓取
+# - 按 host 的全局令牌桶限流：不管多少 worker，总速率不变
+# - 429 / 5xx / 网络错误按共享 RetryPolicy 退避重试，429 时暂停整个 host 的令牌桶
+# - 结果按输入顺序返回
+# ======================================================
+
+MAX_WORKERS = 4
+MAX_ATTEMPTS = 4
+
+# 每个 host 每秒允许的请求数：与原来串行 + sleep(1) 的最小请求间隔（1 秒）一致，
+# 原来每个请求还要再等网络延迟 L（实际 1/(1+L) 次/秒），并发后延迟相互重叠，
+# 总速率稳定在 1 次/秒（搜索 search.py 共用同一个桶）
+HOST_RATE_LIMITS = {
+    "play.google.com": 1.0,
+}
+DEFAULT_RATE_LIMIT = 1.0
+BURST = 1
+
+GOOGLE_PLAY_HOST = "play.google.com"
+
+_limiters = {}          # host -> (TokenBucket, RetryPolicy)
+_limiters_lock = threading.Lock()
+
+_STATUS_RE = re.compile(r"Status code (\d+)")
+
+
+def classify_gp_error(exc):
+    """
+    google_play_scraper 把 HTTP 状态码写在 ExtraHTTPError 的消息里，
+    这里还原成 retry.classify_error 的错误类型
+    """
+    if isinstance(exc, NotFoundError):
+        return "client_error"
+    if isinstance(exc, ExtraHTTPError):
+        match = _STATUS_RE.search(str(exc))
+        status = int(match.group(1)) if match else None
+        if status == 429:
+            return "throttled"
+        if status == 403:
+            return "forbidden"
+        if status is not None and status >= 500:
+            return "server_error"
+        return "client_error"
+    if isinstance(exc, TimeoutError):
+        return "timeout"
+    if isinstance(exc, urllib.error.URLError):
+        return "connection"
+    return classify_error(exc)
+
+
+def _host_state(host):
+    with _limiters_lock:
+        if host not in _limiters:
+            rate = HOST_RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT)
+            limiter = TokenBucket(rate, capacity=BURST)
+            policy = RetryPolicy(max_attempts=MAX_ATTEMPTS, limiter=limiter, classify=classify_gp_error)
+            _limiters[host] = (limiter, policy)
+        return _limiters[host]
+
+
+def host_limiter(host):
+    """每个 host 一个共享令牌桶"""
+    return _host_state(host)[0]
+
+
+def host_policy(host):
+    """每个 host 一个共享重试策略（与令牌桶绑定）"""
+    return _host_state(host)[1]
+
+
+def fetch_app_details(app_id: str, lang='en', country='us') -> dict:
+    """
+    获取 Google Play 应用的所有字段信息，并处理时间字段
+    """
+    try:
+        def fetch():
+            host_limiter(GOOGLE_PLAY_HOST).acquire()
+            return app(app_id, lang=lang, country=country)
+
+        # 回放返回的是归档中的对象，复制一份再补充字段
+        result = dict(HTTP_REPLAY.call(
+            "google_play_scraper.app",
+            {"app_id": app_id, "lang": lang, "country": country},
+            lambda: host_policy(GOOGLE_PLAY_HOST).call(fetch)
+        ))
+
+        # 处理更新时间：将 Unix 时间戳转换为可读日期
+        if 'updated' in result and isinstance(result['updated'], int):
+            result['updatedDate'] = datetime.fromtimestamp(result['updated']).strftime('%Y-%m-%d %H:%M:%S')
+        else:
+            result['updatedDate'] = None
+
+        # 处理发布日期
+        if 'released' in result and isinstance(result['released'], str):
+            result['releasedDate'] = result['released']
+        else:
+            result['releasedDate'] = None
+
+        return result
+    except Exception as e:
+        print(f"[ERROR] Failed to fetch {app_id}: {e}")
+        return {"appId": app_id, "error": str(e)}
+
+
+def fetch_or_load(app_id, store=None, lang='en', country='us') -> dict:
+    """
+    先查本地详情库，命中直接返回；未命中再抓取，成功的结果立即写入库
+    失败的不入库，下次运行会重新抓取
+    """
+    if store is not None:
+        cached = store.get(app_id)
+        if cached is not None:
+            return cached
+
+    details = fetch_app_details(app_id, lang=lang, country=country)
+    if store is not None and 'error' not in details:
+        store.put(details)
+    return details
+
+
+def run_ordered(items, fn, max_workers=MAX_WORKERS, label=None):
+    """
+    用线程池对 items 逐个执行 fn，按输入顺序返回结果列表
+    label(item) 用于打印进度
+    """
+    results = []
+    total = len(items)
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        for idx, (item, result) in enumerate(zip(items, executor.map(fn, items)), 1):
+            if label is not None:
+                print(f"[INFO] Fetched {idx}/{total}: {label(item)}")
+            results.append(result)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
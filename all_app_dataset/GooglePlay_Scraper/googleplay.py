@@ -1,58 +1,41 @@
 import pandas as pd
 import json
-from google_play_scraper import app
-from datetime import datetime
-from time import sleep
+
+from detail_store import STORE_FILE, DetailStore
+from fetch_engine import fetch_or_load, run_ordered
 
 # 输入 CSV 文件路径
 CSV_FILE = "target_matched_only.csv"
 # 输出 JSON 文件路径
 OUTPUT_JSON = "app_details.json"
 
-def fetch_app_details(app_id: str, lang='en', country='us') -> dict:
-    """
-    获取 Google Play 应用的所有字段信息，并处理时间字段
-    """
-    try:
-        result = app(app_id, lang=lang, country=country)
-
-        # 处理更新时间：将 Unix 时间戳转换为可读日期
-        if 'updated' in result and isinstance(result['updated'], int):
-            result['updatedDate'] = datetime.fromtimestamp(result['updated']).strftime('%Y-%m-%d %H:%M:%S')
-        else:
-            result['updatedDate'] = None
-
-        # 处理发布日期
-        if 'released' in result and isinstance(result['released'], str):
-            result['releasedDate'] = result['released']
-        else:
-            result['releasedDate'] = None
-
-        return result
-    except Exception as e:
-        print(f"[ERROR] Failed to fetch {app_id}: {e}")
-        return {"appId": app_id, "error": str(e)}
-
 def main():
     # 读取 CSV 文件
     df = pd.read_csv(CSV_FILE)
     print(f"[INFO] {len(df)} apps loaded from {CSV_FILE}")
 
-    all_app_details = []
+    # 增量详情库：已抓取过的 app 直接读库，只抓新的 / 上次失败的
+    store = DetailStore(STORE_FILE)
+    pkg_names = df['pkg_name'].tolist()
+    cached = sum(1 for pkg in set(pkg_names) if pkg in store)
+    print(f"[INFO] {cached} apps already in {STORE_FILE}, fetching the rest")
 
-    for idx, row in df.iterrows():
-        pkg_name = row['pkg_name']
-        title = row.get('title', '')
-        print(f"[INFO] Fetching {idx+1}/{len(df)}: {title} ({pkg_name})")
+    titles = df['title'].tolist() if 'title' in df.columns else [''] * len(df)
+    targets = list(zip(pkg_names, titles))
 
-        details = fetch_app_details(pkg_name)
+    def fetch(target):
+        pkg_name, title = target
+        details = fetch_or_load(pkg_name, store)
         # 可以保留 CSV 的 title 信息
         details['csv_title'] = title
-
-        all_app_details.append(details)
-
-        # 建议加点延时，防止请求过快被封
-        sleep(1)
+        return details
+
+    # 线程池并发抓取，全局按 host 限流，结果保持 CSV 原顺序
+    all_app_details = run_ordered(
+        targets,
+        fetch,
+        label=lambda t: f"{t[1]} ({t[0]})"
+    )
 
     # 保存为 JSON 文件
     with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
@@ -1,7 +1,7 @@
 import json
-from google_play_scraper import app
-from datetime import datetime
-from time import sleep
+
+from detail_store import STORE_FILE, DetailStore
+from fetch_engine import fetch_or_load, run_ordered
 
 # 输入 JSON 文件（包含所有 appId 的搜索结果）
 INPUT_JSON = "apps_with_appId.json"
@@ -11,34 +11,6 @@ OUTPUT_JSON = "app_details2.json"
 FAILED_JSON = "apps_failed2.json"
 
 
-def fetch_app_details(app_id: str, csv_title='', lang='en', country='us') -> dict:
-    """
-    获取 Google Play 应用的所有字段信息，并处理时间字段
-    """
-    try:
-        result = app(app_id, lang=lang, country=country)
-
-        # 处理更新时间：将 Unix 时间戳转换为可读日期
-        if 'updated' in result and isinstance(result['updated'], int):
-            result['updatedDate'] = datetime.fromtimestamp(result['updated']).strftime('%Y-%m-%d %H:%M:%S')
-        else:
-            result['updatedDate'] = None
-
-        # 处理发布日期
-        if 'released' in result and isinstance(result['released'], str):
-            result['releasedDate'] = result['released']
-        else:
-            result['releasedDate'] = None
-
-        # 保留 CSV 中的 title 信息
-        result['csv_title'] = csv_title
-
-        return result
-    except Exception as e:
-        print(f"[ERROR] Failed to fetch {app_id}: {e}")
-        return {"appId": app_id, "csv_title": csv_title, "error": str(e)}
-
-
 def main():
     # 读取 JSON 文件
     with open(INPUT_JSON, 'r', encoding='utf-8') as f:
@@ -47,24 +19,39 @@ def main():
     all_app_details = []
     failed_apps = []
 
+    # 没有 appId 的直接记为失败，其余交给抓取引擎
+    entries = []
+    targets = []
     for idx, (title, data) in enumerate(search_results.items(), 1):
         app_id = data.get('appId') if data else None
         if not app_id:
-            # 没有 appId 也算失败，直接保存
             print(f"[WARN] {idx}/{len(search_results)} '{title}' 没有 appId")
-            failed_apps.append({"appId": None, "csv_title": title, "error": "No appId in source JSON"})
+            entries.append({"appId": None, "csv_title": title, "error": "No appId in source JSON"})
             continue
+        entries.append(None)
+        targets.append((title, app_id))
 
-        print(f"[INFO] Fetching {idx}/{len(search_results)}: {title} ({app_id})")
-        details = fetch_app_details(app_id, csv_title=title)
+    # 增量详情库：已抓取过的 app 直接读库，只抓新的 / 上次失败的
+    store = DetailStore(STORE_FILE)
+    cached = sum(1 for _, app_id in targets if app_id in store)
+    print(f"[INFO] {cached}/{len(targets)} apps already in {STORE_FILE}, fetching the rest")
 
+    def fetch(target):
+        title, app_id = target
+        details = fetch_or_load(app_id, store)
+        # 保留 CSV 中的 title 信息
+        details['csv_title'] = title
+        return details
+
+    # 线程池并发抓取，全局按 host 限流；结果填回原位置，成功 / 失败列表都保持输入顺序
+    fetched = iter(run_ordered(targets, fetch, label=lambda t: f"{t[0]} ({t[1]})"))
+    for entry in entries:
+        details = entry if entry is not None else next(fetched)
         if 'error' in details:
             failed_apps.append(details)
         else:
             all_app_details.append(details)
 
-        sleep(1)  # 避免请求过快
-
     # 保存成功抓取的应用详情
     with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
         json.dump(all_app_details, f, indent=4, ensure_ascii=False)
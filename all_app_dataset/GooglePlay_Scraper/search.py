@@ -1,7 +1,13 @@
 import csv
 import json
+import os
+import threading
 from google_play_scraper import search
-import time
+
+# fetch_engine 已把上级目录加入 sys.path
+from fetch_engine import GOOGLE_PLAY_HOST, host_limiter, host_policy, run_ordered
+from http_replay import HTTP_REPLAY
+from title_normalize import title_similarity
 
 # 输入 CSV 文件名
 INPUT_CSV = "target_unmatched_only.csv"
@@ -9,6 +15,16 @@ INPUT_CSV = "target_unmatched_only.csv"
 OUTPUT_JSON = "apps_with_appId.json"
 # 输出搜索失败 APP 的 JSON 文件
 FAILED_JSON = "apps_search_failed.json"
+# 原始搜索结果缓存：(title, lang, country) -> hits，重跑只查缓存里没有的 title
+SEARCH_CACHE = "search_cache.jsonl"
+
+# 每个 title 取回的候选数，全部参与重排
+N_HITS = 5
+MAX_WORKERS = 4
+# 置信度低于该值的最佳候选记为失败（0 表示总是接受最佳候选）
+MIN_CONFIDENCE = 0.0
+# 已知开发者时，开发者相似度在置信度中的权重
+DEVELOPER_WEIGHT = 0.2
 
 
 def read_titles_from_csv(csv_file):
@@ -28,47 +44,133 @@ def read_titles_from_csv(csv_file):
     return titles
 
 
-def search_appId_for_titles(titles, lang='en', country='us', n_hits=3, sleep_sec=1):
+class SearchCache:
+    """
+    追加式 JSONL：{"title", "lang", "country", "n_hits", "hits"}
+    同一 key 以最后一次为准；出错的查询不入缓存
+    """
+
+    def __init__(self, path=SEARCH_CACHE):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    key = (entry['title'], entry['lang'], entry['country'])
+                    self.entries[key] = entry
+
+    def get(self, title, lang, country, n_hits):
+        entry = self.entries.get((title, lang, country))
+        if entry is None or entry.get('n_hits', 0) < n_hits:
+            return None
+        return entry['hits']
+
+    def put(self, title, lang, country, n_hits, hits):
+        entry = {'title': title, 'lang': lang, 'country': country, 'n_hits': n_hits, 'hits': hits}
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+            self.entries[(title, lang, country)] = entry
+
+
+def rank_candidates(title, hits, developer=None):
+    """
+    按规范化标题相似度（已知开发者时加权开发者相似度）给全部候选重排
+    返回 [(confidence, 原始名次, hit), ...]，置信度从高到低
     """
-    根据 APP title 列表搜索 Google Play，获取 appId
+    ranked = []
+    for rank, hit in enumerate(hits):
+        if not hit.get('appId'):
+            continue
+        confidence = title_similarity(title, hit.get('title'))
+        if developer:
+            confidence = (
+                (1 - DEVELOPER_WEIGHT) * confidence
+                + DEVELOPER_WEIGHT * title_similarity(developer, hit.get('developer'))
+            )
+        ranked.append((round(confidence, 4), rank, hit))
+    # 置信度相同按商店原始排序
+    ranked.sort(key=lambda r: (-r[0], r[1]))
+    return ranked
+
+
+def search_appId_for_titles(titles, lang='en', country='us', n_hits=N_HITS,
+                            developers=None, cache=None, max_workers=MAX_WORKERS):
+    """
+    根据 APP title 列表并发搜索 Google Play，获取 appId
+    - 原始候选按 (title, lang, country) 缓存，只查询缓存中没有的 title
+    - 全部候选按标题（及开发者）相似度重排，记录匹配置信度
     返回字典 {title: {appId, title, ...}}
     并返回搜索失败的 title 列表
     """
+    developers = developers or {}
+    cache = cache if cache is not None else SearchCache()
+
+    unique_titles = list(dict.fromkeys(titles))
+    missing = [t for t in unique_titles if cache.get(t, lang, country, n_hits) is None]
+    print(f"{len(unique_titles) - len(missing)} 个 title 命中缓存，需搜索 {len(missing)} 个")
+
+    def query(title):
+        def fetch():
+            host_limiter(GOOGLE_PLAY_HOST).acquire()
+            return search(title, lang=lang, country=country, n_hits=n_hits) or []
+
+        try:
+            hits = HTTP_REPLAY.call(
+                "google_play_scraper.search",
+                {"query": title, "lang": lang, "country": country, "n_hits": n_hits},
+                lambda: host_policy(GOOGLE_PLAY_HOST).call(fetch)
+            )
+        except Exception as e:
+            return e
+        cache.put(title, lang, country, n_hits, hits)
+        return None
+
+    errors = dict(zip(missing, run_ordered(missing, query, max_workers=max_workers)))
+
     results_dict = {}
     failed_titles = []
 
-    for idx, title in enumerate(titles, 1):
-        try:
-            search_results = search(title, lang=lang, country=country, n_hits=n_hits)
-
-            if search_results is None or len(search_results) == 0:
-                results_dict[title] = None
-                failed_titles.append(title)
-                print(f"{idx}/{len(titles)} '{title}' 未找到应用")
-                time.sleep(sleep_sec)
-                continue
-
-            best_match = search_results[0]
-            app_id = best_match.get('appId')
-            if app_id:
-                results_dict[title] = {
-                    'appId': app_id,
-                    'title_found': best_match.get('title'),
-                    'score': best_match.get('score'),
-                    'url': f"https://play.google.com/store/apps/details?id={app_id}"
-                }
-                print(f"{idx}/{len(titles)} '{title}' 搜索成功: {app_id}")
-            else:
-                results_dict[title] = None
-                failed_titles.append(title)
-                print(f"{idx}/{len(titles)} '{title}' 搜索失败: 搜索结果中无 appId")
-            time.sleep(sleep_sec)
+    for idx, title in enumerate(unique_titles, 1):
+        if errors.get(title) is not None:
+            print(f"{idx}/{len(unique_titles)} 搜索 '{title}' 出错: {errors[title]}")
+            results_dict[title] = None
+            failed_titles.append(title)
+            continue
 
-        except Exception as e:
-            print(f"{idx}/{len(titles)} 搜索 '{title}' 出错: {e}")
+        hits = cache.get(title, lang, country, n_hits) or []
+        ranked = rank_candidates(title, hits, developers.get(title))
+
+        if not ranked:
+            results_dict[title] = None
+            failed_titles.append(title)
+            reason = "未找到应用" if not hits else "搜索失败: 搜索结果中无 appId"
+            print(f"{idx}/{len(unique_titles)} '{title}' {reason}")
+            continue
+
+        confidence, rank, best_match = ranked[0]
+        if confidence < MIN_CONFIDENCE:
             results_dict[title] = None
             failed_titles.append(title)
-            time.sleep(sleep_sec * 2)  # 出错时多等待
+            print(f"{idx}/{len(unique_titles)} '{title}' 最佳候选置信度过低: {confidence}")
+            continue
+
+        app_id = best_match.get('appId')
+        results_dict[title] = {
+            'appId': app_id,
+            'title_found': best_match.get('title'),
+            'score': best_match.get('score'),
+            'url': f"https://play.google.com/store/apps/details?id={app_id}",
+            'match_confidence': confidence,
+            'search_rank': rank,
+        }
+        print(f"{idx}/{len(unique_titles)} '{title}' 搜索成功: {app_id} (confidence={confidence})")
 
     return results_dict, failed_titles
 
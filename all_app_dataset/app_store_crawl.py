@@ -1,9 +1,19 @@
 import requests
-import time
 import csv
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote_plus
 
+from candidate_store import StreamingCandidateStore
+from crawl_journal import CrawlJournal
+from data_loader import PARQUET_AVAILABLE
+from dataset_store import DatasetStore
+from http_cache import ResponseCache
+from http_replay import HTTP_REPLAY
+from query_planner import QueryYieldLog, dedup_terms, plan_queries, subqueries
+from rate_limit import TokenBucket
+from retry import RetryPolicy
+
 # =========================
 # 1. 全局配置
 # =========================
@@ -16,10 +26,47 @@ HEADERS = {
 # 官方限制 ~20 次/分钟，这里保守
 RATE_LIMIT_SECONDS = 3.5
 
+# 并发 worker 数（共享同一个令牌桶，总速率仍受 RATE_LIMIT_SECONDS 约束）
+MAX_WORKERS = 4
+
+# 单次 search 返回上限；返回数达到上限视为结果被截断（饱和）
+SEARCH_LIMIT = 200
+# 饱和查询先尝试 offset 翻页（最多翻到 MAX_OFFSET）；
+# 若接口忽略 offset（返回与第一页相同），改用子查询，子查询最多再展开 MAX_EXPANSION_DEPTH 层
+MAX_OFFSET = 1000
+MAX_EXPANSION_DEPTH = 1
+
+# 单次请求内最多尝试次数；仍失败的查询在后续轮次中最多重新入队的次数
+MAX_ATTEMPTS = 4
+REQUEUE_ROUNDS = 2
+
 COUNTRIES = ["us", "cn", "jp", "de", "kr", "fr", "gb"]
 
 OUTPUT_FILE = "embodied_intelligence_app_candidates2.csv"
 
+CANDIDATE_FIELDS = [
+    "trackId",
+    "bundleId",
+    "trackName",
+    "primaryGenre",
+    "sellerName",
+    "country"
+]
+
+# True：每个新 app 立即追加到 OUTPUT_FILE（.csv 或 .jsonl），去重集合存 sqlite，
+# 内存不随结果增长；False：全部收集在内存中，最后由 save_candidates 一次写出
+STREAM_OUTPUT = True
+
+# 断点续爬日志：已完成的 (country, term) 及其结果，重启时回放
+# 整轮完成后自动改名为 *.done；只有中断的那一轮会在下次启动时回放
+JOURNAL_FILE = "embodied_intelligence_app_candidates2.journal.jsonl"
+
+# 本地响应缓存：重跑时命中缓存不再请求网络
+CACHE_DIR = ".http_cache"
+CACHE_TTL_SECONDS = 30 * 24 * 3600
+CACHE_MAX_BYTES = 1024 * 1024 * 1024
+CACHE_ONLY = False   # True：只读缓存，未命中的查询直接报错跳过
+
 # =========================
 # 2. 具身智能关键词本体（大规模中英文）
 # =========================
@@ -68,8 +115,8 @@ KEYWORDS = [ # -------- Robotics / Embodiment --------
     "arduino", "raspberry pi", "jetson",
     "robot kit", "stem robot",
 
-    "嵌入式", "机器人套件", "智能硬件"
-                            
+    "嵌入式", "机器人套件", "智能硬件",
+
     "embodied",
 
     "人工智能", "具身智能",
@@ -137,14 +184,32 @@ KEYWORDS = [ # -------- Robotics / Embodiment --------
 # ---------- 字母 / 数字枚举 ----------
 ENUM_TERMS = list("")
 
-SEARCH_TERMS = KEYWORDS + ENUM_TERMS
+# 规范化去重（大小写、全角半角、重复条目）
+SEARCH_TERMS = dedup_terms(KEYWORDS + ENUM_TERMS)
+
+# 每个 (term, country) 历次新增 app 数；低产组合按 PLANNER_MODE 跳过或排到最后
+YIELD_FILE = "query_yield.json"
+PLANNER_MODE = "skip"   # "skip" / "deprioritize"
 
 
 # =========================
 # 3. Search API 调用
 # =========================
 
-def search_apps(term, country, limit=200):
+# 全局令牌桶：所有 worker 共享，保证总请求速率不超过官方限制
+RATE_LIMITER = TokenBucket(1.0 / RATE_LIMIT_SECONDS, capacity=1)
+
+RESPONSE_CACHE = ResponseCache(
+    CACHE_DIR,
+    ttl_seconds=CACHE_TTL_SECONDS,
+    max_bytes=CACHE_MAX_BYTES,
+    cache_only=CACHE_ONLY
+)
+
+RETRY_POLICY = RetryPolicy(max_attempts=MAX_ATTEMPTS, limiter=RATE_LIMITER)
+
+
+def search_apps(term, country, limit=SEARCH_LIMIT, offset=0):
     params = {
         "term": term,
         "country": country,
@@ -152,64 +217,266 @@ def search_apps(term, country, limit=200):
         "entity": "software",
         "limit": limit
     }
+    if offset:
+        params["offset"] = offset
+
+    def fetch():
+        # 只有真正发网络请求时才消耗令牌，缓存命中不限流
+        RATE_LIMITER.acquire()
+        response = requests.get(
+            BASE_URL,
+            params=params,
+            headers=HEADERS,
+            timeout=15
+        )
+        response.raise_for_status()
+        return response.json()
 
-    response = requests.get(
-        BASE_URL,
-        params=params,
-        headers=HEADERS,
-        timeout=15
+    # 录制 / 回放包在最外层：replay 时不查缓存、不限流
+    payload = HTTP_REPLAY.call(
+        BASE_URL, params, lambda: RESPONSE_CACHE.fetch(BASE_URL, params, fetch)
     )
-    response.raise_for_status()
-    return response.json().get("results", [])
+    return payload.get("results", [])
+
+
+def _search_unit(unit, journal=None):
+    """worker：按重试策略执行一次 search（限流在 search_apps 内部），异常交给主线程处理"""
+    country, term, offset = unit
+    try:
+        results = RETRY_POLICY.call(search_apps, term, country, offset=offset)
+    except Exception as e:
+        return None, e
+
+    if journal is not None:
+        journal.record(country, term, results, offset=offset)
+    return results, None
 
 
 # =========================
 # 4. 主爬取逻辑（去重）
 # =========================
 
-def crawl_candidate_app_ids():
-    seen = {}  # key: trackId or bundleId
-
+def merge_results(seen, results, country):
+    """把一次 search 的结果并入 seen（先到先得，与串行顺序一致），返回新增数"""
+    new_apps = 0
+    for app in results:
+        track_id = app.get("trackId")
+        bundle_id = app.get("bundleId")
+
+        key = track_id or bundle_id
+        if not key:
+            continue
+
+        if key not in seen:
+            seen[key] = {
+                "trackId": track_id,
+                "bundleId": bundle_id,
+                "trackName": app.get("trackName"),
+                "primaryGenre": app.get("primaryGenreName"),
+                "sellerName": app.get("sellerName"),
+                "country": country
+            }
+            new_apps += 1
+
+    return new_apps
+
+
+def _result_ids(results):
+    return tuple(app.get("trackId") or app.get("bundleId") for app in results)
+
+
+def crawl_candidate_app_ids(
+    max_workers=MAX_WORKERS,
+    journal_file=JOURNAL_FILE,
+    yield_file=YIELD_FILE,
+    stream_to=None
+):
+    """
+    stream_to 为输出路径时边爬边写（返回 StreamingCandidateStore），
+    否则返回内存中的 seen dict
+    """
     total_requests = 0
 
-    for country in COUNTRIES:
-        print(f"\n=== Country: {country} ===")
-
-        for term in SEARCH_TERMS:
-            try:
-                results = search_apps(term, country)
-                total_requests += 1
-
-                print(
-                    f"[{country}] term='{term}' "
-                    f"-> {len(results)} results "
-                    f"(req #{total_requests})"
-                )
-
-                for app in results:
-                    track_id = app.get("trackId")
-                    bundle_id = app.get("bundleId")
-
-                    key = track_id or bundle_id
-                    if not key:
-                        continue
-
-                    if key not in seen:
-                        seen[key] = {
-                            "trackId": track_id,
-                            "bundleId": bundle_id,
-                            "trackName": app.get("trackName"),
-                            "primaryGenre": app.get("primaryGenreName"),
-                            "sellerName": app.get("sellerName"),
-                            "country": country
-                        }
-
-                time.sleep(RATE_LIMIT_SECONDS)
-
-            except Exception as e:
-                print(f"[ERROR] {country} | {term} | {e}", file=sys.stderr)
-                time.sleep(10)
-
+    # ---------- 按历史产出规划本轮查询 ----------
+    yield_log = QueryYieldLog(yield_file)
+    pairs = plan_queries(SEARCH_TERMS, COUNTRIES, yield_log, mode=PLANNER_MODE)
+
+    # 查询单元：(country, term, offset)；翻页和子查询的新增计入其根查询
+    units = [(country, term, 0) for country, term in pairs]
+    root = {(country, term): term for country, term in pairs}
+    depth = {(country, term): 0 for country, term in pairs}
+    first_page = {}
+    yields = {}
+    replayed_roots = set()
+    requeued = {}
+    # 接口是否支持 offset：None 未知 / "honored" / "ignored"
+    # 未知时同一时刻只发一个 offset 探测，其余饱和查询挂起等结论；
+    # 一旦发现接口忽略 offset，本轮其余饱和查询不再探测，直接拆子查询
+    offset_mode = None
+    probe = None
+    waiting = []
+
+    # ---------- 回放日志，跳过已完成的组合 ----------
+    journal = CrawlJournal(journal_file) if journal_file else None
+    completed = journal.load() if journal else {}
+    if completed:
+        print(f"Replaying {len(completed)} completed queries from {journal_file}")
+
+    # key: trackId or bundleId；续爬时沿用已写出的流式输出
+    if stream_to:
+        seen = StreamingCandidateStore(stream_to, CANDIDATE_FIELDS, resume=bool(completed))
+    else:
+        seen = {}
+
+    def fetch(unit):
+        if unit in completed:
+            return completed[unit], None
+        return _search_unit(unit, journal)
+
+    def split(country, term):
+        key = (country, term)
+        if depth[key] >= MAX_EXPANSION_DEPTH:
+            return []
+        children = []
+        for sub in subqueries(term):
+            if (country, sub) in depth:
+                continue
+            depth[(country, sub)] = depth[key] + 1
+            root[(country, sub)] = root[key]
+            children.append((country, sub, 0))
+        print(f"[{country}] term='{term}' saturated -> {len(children)} sub-queries")
+        return children
+
+    def after_first_page(country, term):
+        """首页饱和：按已知的 offset 行为翻页或拆子查询；未知且已有探测在途时挂起"""
+        nonlocal probe
+        if offset_mode == "ignored":
+            return split(country, term)
+        unit = (country, term, SEARCH_LIMIT)
+        if offset_mode is None:
+            if probe is not None:
+                waiting.append((country, term))
+                return []
+            probe = unit
+        return [unit]
+
+    def release_waiting():
+        """探测有结论（或失败）后放行挂起的查询"""
+        nonlocal probe
+        probe = None
+        pending_pairs = list(waiting)
+        waiting.clear()
+        units = []
+        for country, term in pending_pairs:
+            units.extend(after_first_page(country, term))
+        return units
+
+    def expand(country, term, offset, results):
+        """饱和结果的后续单元：先翻页，接口忽略 offset 时改为子查询"""
+        nonlocal offset_mode
+        key = (country, term)
+        released = []
+        ignored = False
+        if offset:
+            ignored = _result_ids(results) == first_page.get(key)
+            if ignored and offset_mode != "ignored":
+                offset_mode = "ignored"
+                print(f"[{country}] term='{term}' offset ignored by the API, "
+                      f"skipping offset probes for the rest of this run")
+            elif not ignored and offset_mode is None:
+                offset_mode = "honored"
+            if (country, term, offset) == probe:
+                released = release_waiting()
+
+        if len(results) < SEARCH_LIMIT:
+            return released
+
+        if offset == 0:
+            first_page[key] = _result_ids(results)
+            return released + after_first_page(country, term)
+
+        if not ignored:
+            if offset + SEARCH_LIMIT < MAX_OFFSET:
+                return released + [(country, term, offset + SEARCH_LIMIT)]
+            return released
+        return released + split(country, term)
+
+    # 多个请求并发在途；executor.map 按提交顺序返回，
+    # 因此合并顺序与串行爬取完全一致，输出 CSV 不变
+    current_country = None
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        pending = units
+        round_no = 0
+        while pending:
+            if round_no:
+                print(f"\n=== Round {round_no}: {len(pending)} expanded / re-queued queries ===")
+
+            next_units = []
+            for unit, (results, error) in zip(pending, executor.map(fetch, pending)):
+                country, term, offset = unit
+                label = f"term='{term}'" + (f" offset={offset}" if offset else "")
+
+                if country != current_country:
+                    current_country = country
+                    print(f"\n=== Country: {country} ===")
+
+                if error is not None:
+                    print(f"[ERROR] {country} | {label} | {error}", file=sys.stderr)
+                    # 可重试的错误（429/403/5xx/超时）放到下一轮重新请求
+                    if RETRY_POLICY.is_retryable(error):
+                        if requeued.get(unit, 0) < REQUEUE_ROUNDS:
+                            requeued[unit] = requeued.get(unit, 0) + 1
+                            RETRY_POLICY.stats.incr("requeued")
+                            next_units.append(unit)
+                        else:
+                            RETRY_POLICY.stats.incr("gave_up")
+                            if unit == probe:
+                                # 探测失败没有结论，换一个挂起的查询继续探测
+                                next_units.extend(release_waiting())
+                    continue
+
+                if unit in completed:
+                    print(f"[{country}] {label} -> {len(results)} results (journal)")
+                else:
+                    total_requests += 1
+                    print(
+                        f"[{country}] {label} "
+                        f"-> {len(results)} results "
+                        f"(req #{total_requests})"
+                    )
+
+                new_apps = merge_results(seen, results, country)
+                root_pair = (country, root[(country, term)])
+                yields[root_pair] = yields.get(root_pair, 0) + new_apps
+                if unit in completed:
+                    replayed_roots.add(root_pair)
+
+                next_units.extend(expand(country, term, offset, results))
+
+            pending = next_units
+            round_no += 1
+
+        # 整轮完成：归档日志，下次运行重新爬取（而不是回放旧结果）
+        if journal is not None:
+            journal.finish()
+    finally:
+        # Ctrl-C 时不等待剩余排队任务，已完成的组合都已写入日志
+        executor.shutdown(wait=False, cancel_futures=True)
+        if stream_to:
+            seen.close()
+
+    # 只有完整跑完才写入产出记录；中断后靠 journal 回放，避免同一轮被记两次。
+    # 有单元来自 journal 回放的查询不记录：续爬时这些 app 已在去重集合里，
+    # 新增数会被算成 0，几轮之后会被 planner 误判为无产出而跳过
+    if yield_file:
+        for (country, term), new_apps in yields.items():
+            if (country, term) in replayed_roots:
+                continue
+            yield_log.record(country, term, new_apps)
+        yield_log.save()
+
+    print(f"\nRetry stats: {RETRY_POLICY.stats.summary()}")
     return seen
 
 
@@ -219,17 +486,7 @@ def crawl_candidate_app_ids():
 
 def save_candidates(apps, filename):
     with open(filename, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "trackId",
-                "bundleId",
-                "trackName",
-                "primaryGenre",
-                "sellerName",
-                "country"
-            ]
-        )
+        writer = csv.DictWriter(f, fieldnames=CANDIDATE_FIELDS)
         writer.writeheader()
 
         for app in apps.values():
@@ -242,8 +499,20 @@ def save_candidates(apps, filename):
 
 if __name__ == "__main__":
     print("Starting embodied intelligence App Store crawl...")
-    candidates = crawl_candidate_app_ids()
-    print(f"\nTotal unique candidate apps: {len(candidates)}")
-    save_candidates(candidates, OUTPUT_FILE)
+    if STREAM_OUTPUT:
+        candidates = crawl_candidate_app_ids(stream_to=OUTPUT_FILE)
+        print(f"\nTotal unique candidate apps: {len(candidates)}")
+    else:
+        candidates = crawl_candidate_app_ids()
+        print(f"\nTotal unique candidate apps: {len(candidates)}")
+        save_candidates(candidates, OUTPUT_FILE)
     print(f"Saved to: {OUTPUT_FILE}")
+    # 候选表同时写入列式 store（candidates/raw），match_app_store.py 按列读取；内容未变时不新增版本
+    if PARQUET_AVAILABLE and OUTPUT_FILE.endswith(".csv"):
+        version = DatasetStore().import_csv(OUTPUT_FILE, "candidates", "raw")
+        print(f"Store version: candidates/raw v{version}")
+    print(
+        f"HTTP cache: {RESPONSE_CACHE.hits} hits, "
+        f"{RESPONSE_CACHE.misses} misses ({CACHE_DIR})"
+    )
 
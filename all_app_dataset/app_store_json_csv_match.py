@@ -1,15 +1,23 @@
 import pandas as pd
 import json
 
+from data_loader import read_table
+from fuzzy_index import FuzzyTitleIndex, match_leftovers
+
 # ========= 1. 文件路径 =========
 csv_path = "embodied_intelligence_app_candidates.csv"
 json_path = "GooglePlay_Scraper/apps_failed2.json"
 
 matched_csv_path = "app_store_json_csv_matched_apps.csv"
 unmatched_csv_path = "app_store_json_csv_unmatched_apps.csv"
+fuzzy_csv_path = "app_store_json_csv_fuzzy_candidates.csv"
+
+# 近似匹配参数
+fuzzy_top_k = 3
+fuzzy_min_score = 0.6
 
 # ========= 2. 读取 CSV =========
-df_csv = pd.read_csv(csv_path, encoding="gbk")
+df_csv = read_table(csv_path)
 
 # CSV 中 APP 名称字段（根据你的实际字段名修改）
 csv_app_col = "trackName"
@@ -40,6 +48,27 @@ unmatched_df = pd.DataFrame(unmatched_apps, columns=["app_title"])
 
 unmatched_df.to_csv(unmatched_csv_path, index=False, encoding="utf-8-sig")
 
+# ========= 6. 未匹配的 JSON title 近似匹配 CSV =========
+fuzzy_index = FuzzyTitleIndex(
+    None if pd.isna(name) else name for name in df_csv[csv_app_col]
+)
+fuzzy_rows = match_leftovers(unmatched_apps, fuzzy_index, k=fuzzy_top_k, min_score=fuzzy_min_score)
+
+fuzzy_df = pd.DataFrame(
+    [
+        {
+            "app_title": r["query"],
+            "rank": r["rank"],
+            csv_app_col: r["candidate"],
+            "match_confidence": r["match_confidence"],
+        }
+        for r in fuzzy_rows
+    ],
+    columns=["app_title", "rank", csv_app_col, "match_confidence"]
+)
+fuzzy_df.to_csv(fuzzy_csv_path, index=False, encoding="utf-8-sig")
+
 print("处理完成：")
 print(f"- 匹配到的 APP 已保存到 {matched_csv_path}")
 print(f"- 未匹配到的 APP 已保存到 {unmatched_csv_path}")
+print(f"- 近似匹配候选已保存到 {fuzzy_csv_path}（{fuzzy_df['app_title'].nunique()} 个 APP 有候选）")
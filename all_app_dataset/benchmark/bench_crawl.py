@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "GooglePlay_Scraper"))
+
+import requests  # noqa: E402
+
+import app_store_crawl  # noqa: E402
+import lookup_description  # noqa: E402
+from fake_store_server import FakeStoreState, start_server  # noqa: E402
+from http_cache import ResponseCache  # noqa: E402
+from rate_limit import TokenBucket  # noqa: E402
+from retry import RetryPolicy  # noqa: E402
+
+# ======================================================
+# 爬虫吞吐量基准：用本地替身服务器驱动真实的爬取函数
+#   1. app_store_crawl.crawl_candidate_app_ids
+#   2. lookup_description.enrich_with_description
+#   3. GooglePlay_Scraper/fetch_engine.run_ordered + fetch_or_load
+#   4. GooglePlay_Scraper/search.search_appId_for_titles
+# 输出每个阶段的 wall time、requests/s、apps/s、429 数和客户端重试计数
+# ======================================================
+
+
+def _server_delta(state, before):
+    return {k: state.counts.get(k, 0) - before.get(k, 0) for k in ("requests", "throttled", "errors")}
+
+
+def _report(stage, wall, server, apps, retry_stats):
+    return {
+        "stage": stage,
+        "wall_s": round(wall, 3),
+        "requests": server["requests"],
+        "requests_per_s": round(server["requests"] / wall, 2) if wall else 0.0,
+        "apps": apps,
+        "apps_per_s": round(apps / wall, 2) if wall else 0.0,
+        "server_429": server["throttled"],
+        "server_5xx": server["errors"],
+        "client_retries": retry_stats.get("retries", 0) if retry_stats else 0,
+        "client_requeued": retry_stats.get("requeued", 0) if retry_stats else 0,
+        "client_gave_up": retry_stats.get("gave_up", 0) if retry_stats else 0,
+    }
+
+
+def _fresh_policy(module, rps, workdir):
+    """每个阶段独立的限流 / 重试 / 缓存，避免阶段之间互相影响"""
+    module.RATE_LIMITER = TokenBucket(rps, capacity=1)
+    module.RETRY_POLICY = RetryPolicy(
+        max_attempts=module.MAX_ATTEMPTS,
+        base_delay=0.2,
+        forbidden_delay=0.5,
+        network_delay=0.05,
+        limiter=module.RATE_LIMITER,
+    )
+    module.RESPONSE_CACHE = ResponseCache(os.path.join(workdir, "http_cache"), ttl_seconds=0)
+
+
+def bench_search(base_url, state, args, workdir):
+    crawl = app_store_crawl
+    crawl.BASE_URL = base_url + "/search"
+    crawl.COUNTRIES = crawl.COUNTRIES[:args.countries]
+    crawl.SEARCH_TERMS = crawl.SEARCH_TERMS[:args.terms]
+    _fresh_policy(crawl, args.rps, workdir)
+
+    before = dict(state.counts)
+    start = time.perf_counter()
+    seen = crawl.crawl_candidate_app_ids(
+        max_workers=args.workers, journal_file=None, yield_file=None
+    )
+    wall = time.perf_counter() - start
+
+    candidates_csv = os.path.join(workdir, "candidates.csv")
+    crawl.save_candidates(seen, candidates_csv)
+    return _report("itunes_search", wall, _server_delta(state, before), len(seen),
+                   crawl.RETRY_POLICY.stats.counts), candidates_csv
+
+
+def bench_lookup(base_url, state, args, workdir, candidates_csv):
+    lookup = lookup_description
+    lookup.LOOKUP_URL = base_url + "/lookup"
+    lookup.INPUT_FILE = candidates_csv
+    lookup.OUTPUT_FILE = os.path.join(workdir, "with_description.csv")
+    _fresh_policy(lookup, args.rps, workdir)
+
+    before = dict(state.counts)
+    start = time.perf_counter()
+    lookup.enrich_with_description(max_workers=args.workers)
+    wall = time.perf_counter() - start
+
+    enriched = 0
+    if os.path.exists(lookup.OUTPUT_FILE):
+        with open(lookup.OUTPUT_FILE, encoding="utf-8") as f:
+            enriched = max(0, sum(1 for _ in f) - 1)
+    return _report("itunes_lookup", wall, _server_delta(state, before), enriched,
+                   lookup.RETRY_POLICY.stats.counts)
+
+
+def _fresh_gp_policy(fetch_engine, rps):
+    """Google Play 各阶段重新创建 host 令牌桶 / 重试策略"""
+    fetch_engine.HOST_RATE_LIMITS[fetch_engine.GOOGLE_PLAY_HOST] = rps
+    fetch_engine._limiters.clear()
+    policy = fetch_engine.host_policy(fetch_engine.GOOGLE_PLAY_HOST)
+    policy.base_delay, policy.forbidden_delay, policy.network_delay = 0.2, 0.5, 0.05
+    return policy
+
+
+def bench_google_play(base_url, state, args):
+    try:
+        import fetch_engine
+    except ImportError as e:
+        print(f"[SKIP] Google Play stage: {e}")
+        return None
+
+    def fake_app(app_id, lang="en", country="us"):
+        r = requests.get(base_url + "/gp/details", params={"id": app_id}, timeout=15)
+        r.raise_for_status()
+        return r.json()
+
+    fetch_engine.app = fake_app
+    policy = _fresh_gp_policy(fetch_engine, args.rps)
+
+    app_ids = [f"com.fake.bench{i}" for i in range(args.gp_apps)]
+    before = dict(state.counts)
+    start = time.perf_counter()
+    results = fetch_engine.run_ordered(
+        app_ids,
+        lambda app_id: fetch_engine.fetch_or_load(app_id),
+        max_workers=args.workers,
+    )
+    wall = time.perf_counter() - start
+    ok = sum(1 for r in results if "error" not in r)
+    return _report("google_play_details", wall, _server_delta(state, before), ok, policy.stats.counts)
+
+
+def bench_google_play_search(base_url, state, args, workdir):
+    try:
+        import fetch_engine
+        import search as gp_search
+    except ImportError as e:
+        print(f"[SKIP] Google Play search stage: {e}")
+        return None
+
+    def fake_search(query, lang="en", country="us", n_hits=3):
+        r = requests.get(base_url + "/gp/search", params={"q": query, "n_hits": n_hits}, timeout=15)
+        r.raise_for_status()
+        return r.json()
+
+    gp_search.search = fake_search
+    policy = _fresh_gp_policy(fetch_engine, args.rps)
+    cache = gp_search.SearchCache(os.path.join(workdir, "search_cache.jsonl"))
+
+    titles = [f"Bench Robot {i}" for i in range(args.gp_apps)]
+    before = dict(state.counts)
+    start = time.perf_counter()
+    results, _ = gp_search.search_appId_for_titles(titles, cache=cache, max_workers=args.workers)
+    wall = time.perf_counter() - start
+    ok = sum(1 for r in results.values() if r)
+    return _report("google_play_search", wall, _server_delta(state, before), ok, policy.stats.counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawler throughput benchmark against a local fake store")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rps", type=float, default=20.0, help="客户端令牌桶速率（次/秒）")
+    parser.add_argument("--countries", type=int, default=2)
+    parser.add_argument("--terms", type=int, default=40)
+    parser.add_argument("--gp-apps", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=None, help="服务端超过该速率返回 429")
+    parser.add_argument("--recorded-dir", default=None, help="用 ResponseCache 中录制的响应代替合成数据")
+    parser.add_argument("--json", default=None, help="把结果写入 JSON 文件（CI 对比用）")
+    args = parser.parse_args()
+
+    state = FakeStoreState(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, max_rps=args.max_rps,
+        recorded_dir=args.recorded_dir,
+    )
+    server, base_url = start_server(state)
+    workdir = tempfile.mkdtemp(prefix="eai_bench_")
+
+    reports = []
+    try:
+        search_report, candidates_csv = bench_search(base_url, state, args, workdir)
+        reports.append(search_report)
+        reports.append(bench_lookup(base_url, state, args, workdir, candidates_csv))
+        gp_report = bench_google_play(base_url, state, args)
+        if gp_report:
+            reports.append(gp_report)
+        gp_search_report = bench_google_play_search(base_url, state, args, workdir)
+        if gp_search_report:
+            reports.append(gp_search_report)
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    columns = ["stage", "wall_s", "requests", "requests_per_s", "apps", "apps_per_s",
+               "server_429", "server_5xx", "client_retries", "client_requeued", "client_gave_up"]
+    print("\n=== Benchmark ===")
+    print(" | ".join(columns))
+    for r in reports:
+        print(" | ".join(str(r[c]) for c in columns))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": reports}, f, indent=2)
+        print(f"Saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
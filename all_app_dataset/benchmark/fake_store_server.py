@@ -0,0 +1,240 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from http_cache import cache_key  # noqa: E402
+
+# ======================================================
+# 本地替身商店服务器（离线压测 / CI 用）
+#   /search      : iTunes Search  (term, country, limit, offset)
+#   /lookup      : iTunes Lookup  (id=1,2,3, country)
+#   /gp/details  : Google Play 详情 (id)
+#   /gp/search   : Google Play 搜索 (q, n_hits)
+# 数据来源：
+#   - recorded : 优先读取 .http_cache 中录制的真实 iTunes 响应
+#   - 合成数据 : 根据参数哈希生成，结果稳定可复现
+# 故障注入：固定延迟 + 抖动、5xx 比例、429 比例、超过 max_rps 时返回 429
+# ======================================================
+
+ITUNES_SEARCH_URL = "https://itunes.apple.com/search"
+ITUNES_LOOKUP_URL = "https://itunes.apple.com/lookup"
+
+GENRES = ["Utilities", "Education", "Productivity", "Lifestyle", "Games", "Photo & Video"]
+
+
+def _seed(*parts):
+    return int(hashlib.md5("|".join(map(str, parts)).encode("utf-8")).hexdigest(), 16)
+
+
+def synthetic_search(term, country, limit, offset):
+    """结果数由 term 决定：短词（宽泛）饱和，长词（品牌名）只有几个"""
+    h = _seed(term)
+    total = 600 if len(term) <= 6 else h % 40
+    count = max(0, min(limit, total - offset))
+    results = []
+    for i in range(offset, offset + count):
+        track_id = 1000000000 + (_seed(term, i) % 50000)
+        results.append({
+            "trackId": track_id,
+            "bundleId": f"com.fake.app{track_id}",
+            "trackName": f"{term} app {i}",
+            "primaryGenreName": GENRES[track_id % len(GENRES)],
+            "sellerName": f"Seller {track_id % 997}",
+        })
+    return {"resultCount": len(results), "results": results}
+
+
+def synthetic_lookup(ids, country):
+    results = []
+    for tid in ids:
+        if not tid.isdigit() or int(tid) % 23 == 0:   # 约 4% 查不到
+            continue
+        results.append({
+            "trackId": int(tid),
+            "genres": [GENRES[int(tid) % len(GENRES)]],
+            "description": f"Synthetic description of {tid} ({country})",
+            "version": "1.0",
+            "releaseNotes": "",
+            "supportedDevices": ["iPhone"],
+            "minimumOsVersion": "13.0",
+            "languageCodesISO2A": ["EN"],
+        })
+    return {"resultCount": len(results), "results": results}
+
+
+def synthetic_gp_details(app_id):
+    h = _seed(app_id)
+    return {
+        "appId": app_id,
+        "title": f"App {app_id.split('.')[-1]}",
+        "developer": f"Developer {h % 997}",
+        "description": f"Synthetic Google Play app {app_id}",
+        "score": round((h % 50) / 10, 1),
+        "realInstalls": h % 1000000,
+        "released": "Mar 3, 2019",
+        "updated": 1700000000,
+        "version": "1.0",
+        "url": f"https://play.google.com/store/apps/details?id={app_id}",
+    }
+
+
+def synthetic_gp_search(query, n_hits):
+    slug = "".join(ch for ch in query.lower() if ch.isalnum()) or "app"
+    return [
+        {
+            "appId": f"com.fake.{slug}{i}",
+            "title": query if i == 0 else f"{query} {i}",
+            "developer": f"Developer {_seed(slug) % 997}",
+            "score": 4.0,
+        }
+        for i in range(n_hits)
+    ]
+
+
+class FakeStoreState:
+    """服务器配置 + 计数器（线程安全）"""
+
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0,
+                 throttle_rate=0.0, max_rps=None, retry_after=1,
+                 recorded_dir=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.recorded_dir = recorded_dir
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = []          # 最近一秒内的请求时间
+        self.counts = {}
+
+    def incr(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def decide(self):
+        """决定本次请求的故障注入结果：None / 429 / 500"""
+        now = time.monotonic()
+        with self.lock:
+            self.window = [t for t in self.window if now - t < 1.0]
+            self.window.append(now)
+            over_limit = self.max_rps is not None and len(self.window) > self.max_rps
+            roll = self.random.random()
+        if over_limit or roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+    def recorded(self, endpoint, params):
+        """从 ResponseCache 目录读取录制的真实响应"""
+        if not self.recorded_dir:
+            return None
+        key = cache_key(endpoint, params)
+        path = os.path.join(self.recorded_dir, key[:2], key + ".json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)["payload"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+class FakeStoreHandler(BaseHTTPRequestHandler):
+    state = None   # 由 start_server 注入
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload=None, headers=None):
+        body = json.dumps(payload if payload is not None else {}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        state = self.state
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        state.incr("requests")
+
+        delay = state.latency + state.random.uniform(-state.jitter, state.jitter)
+        time.sleep(max(0.0, delay))
+
+        fault = state.decide()
+        if fault == 429:
+            state.incr("throttled")
+            return self._send(429, {"error": "rate limited"}, {"Retry-After": str(state.retry_after)})
+        if fault == 500:
+            state.incr("errors")
+            return self._send(500, {"error": "injected failure"})
+
+        if url.path == "/search":
+            payload = state.recorded(ITUNES_SEARCH_URL, query) or synthetic_search(
+                query.get("term", ""),
+                query.get("country", "us"),
+                int(query.get("limit", 50)),
+                int(query.get("offset", 0)),
+            )
+        elif url.path == "/lookup":
+            payload = state.recorded(ITUNES_LOOKUP_URL, query) or synthetic_lookup(
+                [i for i in query.get("id", "").split(",") if i],
+                query.get("country", "us"),
+            )
+        elif url.path == "/gp/details":
+            payload = synthetic_gp_details(query.get("id", ""))
+        elif url.path == "/gp/search":
+            payload = synthetic_gp_search(query.get("q", ""), int(query.get("n_hits", 3)))
+        else:
+            state.incr("not_found")
+            return self._send(404, {"error": "unknown endpoint"})
+
+        state.incr("ok")
+        self._send(200, payload)
+
+
+def start_server(state, host="127.0.0.1", port=0):
+    """在后台线程启动服务器，返回 (server, base_url)；port=0 自动选端口"""
+    handler = type("Handler", (FakeStoreHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in iTunes / Google Play server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=None)
+    parser.add_argument("--recorded-dir", default=None, help="ResponseCache 目录，如 ../.http_cache")
+    args = parser.parse_args()
+
+    state = FakeStoreState(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, max_rps=args.max_rps,
+        recorded_dir=args.recorded_dir,
+    )
+    server, base_url = start_server(state, port=args.port)
+    print(f"Fake store listening on {base_url} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,123 @@
+import csv
+import json
+import os
+import sqlite3
+
+# ======================================================
+# 流式候选集输出
+# - 每发现一个新 app 立即追加一行到 CSV（或 .jsonl），并 flush，
+#   下游阶段可以边爬边 tail 输出文件
+# - 去重集合存在旁边的 sqlite 文件中，内存占用不随 app 数增长
+# - 输出文件是唯一可信来源：续爬时由输出文件重建去重集合，
+#   崩溃在“写行”与“写库”之间也不会产生重复或遗漏
+# ======================================================
+
+
+class StreamingCandidateStore:
+    """
+    与 crawl 里的 seen dict 接口一致：
+        key in store     → 是否已见过
+        store[key] = row → 记录并立即写出
+        len(store)       → 已写出的 app 数
+    """
+
+    def __init__(self, output_file, fieldnames, resume=False, seen_file=None):
+        self.output_file = output_file
+        self.fieldnames = list(fieldnames)
+        self.seen_file = seen_file or output_file + ".seen.sqlite"
+        self.jsonl = output_file.endswith(".jsonl")
+
+        if not resume:
+            for path in (self.output_file, self.seen_file):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        self._db = sqlite3.connect(self.seen_file)
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute("PRAGMA journal_mode = MEMORY")
+        self._db.execute("DROP TABLE IF EXISTS seen")
+        self._db.execute("CREATE TABLE seen (key TEXT PRIMARY KEY)")
+        self._count = 0
+
+        existed = os.path.exists(self.output_file)
+        if existed:
+            self._drop_partial_line()
+            existed = os.path.getsize(self.output_file) > 0
+        if existed:
+            self._rebuild_seen()
+
+        self._file = open(self.output_file, "a", newline="", encoding="utf-8")
+        if not self.jsonl:
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            if not existed:
+                self._writer.writeheader()
+                self._file.flush()
+
+    @staticmethod
+    def _key(key):
+        return str(key)
+
+    def _drop_partial_line(self):
+        """崩溃时最后一行可能只写了一半：截断到最后一个换行符"""
+        with open(self.output_file, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            pos = size
+            while pos > 0:
+                step = min(4096, pos)
+                f.seek(pos - step)
+                chunk = f.read(step)
+                idx = chunk.rfind(b"\n")
+                if idx != -1:
+                    pos = pos - step + idx + 1
+                    break
+                pos -= step
+            if pos < size:
+                f.truncate(pos)
+
+    def _existing_rows(self):
+        with open(self.output_file, newline="", encoding="utf-8") as f:
+            if self.jsonl:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+            else:
+                yield from csv.DictReader(f)
+
+    def _rebuild_seen(self):
+        """续爬：从已有输出文件重建去重集合"""
+        for row in self._existing_rows():
+            key = row.get("trackId") or row.get("bundleId")
+            if key:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO seen (key) VALUES (?)", (self._key(key),)
+                )
+                self._count += 1
+        self._db.commit()
+
+    def __contains__(self, key):
+        cur = self._db.execute("SELECT 1 FROM seen WHERE key = ?", (self._key(key),))
+        return cur.fetchone() is not None
+
+    def __setitem__(self, key, row):
+        self._db.execute("INSERT OR IGNORE INTO seen (key) VALUES (?)", (self._key(key),))
+        if self.jsonl:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        else:
+            self._writer.writerow(row)
+        self._file.flush()
+        self._count += 1
+        if self._count % 1000 == 0:
+            self._db.commit()
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        self._file.close()
+        self._db.commit()
+        self._db.close()
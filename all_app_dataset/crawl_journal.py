@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+import threading
+
+# ======================================================
+# 追加式爬取日志（断点续爬）
+# 每完成一个 (country, term, offset) 写一行 JSON：
+#   {"country": ..., "term": ..., "offset": ..., "results": [...]}
+# 重启时回放日志，已完成的组合直接复用结果，不再请求
+# 整轮爬取完成后 finish() 把日志改名为 *.done，下一次运行是全新的一轮
+# ======================================================
+
+# 只保留合并阶段用到的字段，避免 description 等大字段把日志撑到 GB 级
+JOURNAL_FIELDS = (
+    "trackId",
+    "bundleId",
+    "trackName",
+    "primaryGenreName",
+    "sellerName",
+)
+
+
+class CrawlJournal:
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        回放日志，返回 {(country, term, offset): results}
+        崩溃时写了一半的最后一行会被跳过（该组合重新爬取）
+        """
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+
+        offset = 0
+        valid_end = 0
+        with open(self.path, "rb") as f:
+            for line_no, raw in enumerate(f, 1):
+                offset += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line.decode("utf-8"))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    print(
+                        f"[WARN] journal {self.path}:{line_no} 不完整，已忽略",
+                        file=sys.stderr
+                    )
+                    continue
+                key = (record["country"], record["term"], record.get("offset", 0))
+                completed[key] = record["results"]
+                valid_end = offset
+
+        # 截掉末尾写了一半的行，避免后续追加的记录与其粘连
+        if valid_end < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+
+        return completed
+
+    def record(self, country, term, results, offset=0):
+        """追加一条完成记录并立即落盘（多 worker 线程安全）"""
+        line = json.dumps(
+            {
+                "country": country,
+                "term": term,
+                "offset": offset,
+                "results": [
+                    {k: app.get(k) for k in JOURNAL_FIELDS}
+                    for app in results
+                ],
+            },
+            ensure_ascii=False
+        )
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def finish(self):
+        """本轮已完整跑完：日志改名归档，下次运行不再回放"""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.replace(self.path, self.path + ".done")
@@ -0,0 +1,151 @@
+import codecs
+import glob
+import hashlib
+import json
+import os
+import sys
+
+# ======================================================
+# 统一的表格读取（所有脚本共用）
+# 1. 编码只探测一次：BOM -> utf-8 -> gb18030 逐个整文件严格解码，
+#    都失败时用 utf-8 + 替换字符，不再静默丢字节 / 把中文读成乱码
+# 2. 用 C 引擎解析（low_memory=False，整列一次推断类型）
+# 3. 首次读取后在源文件旁的 .table_cache/ 写带类型的 Parquet 副本，
+#    以源文件内容哈希 + 读取参数为 key；之后读取直接命中副本
+#    （Parquet 需要 pyarrow，没装时跳过缓存，照常解析 CSV）
+# ======================================================
+
+CACHE_DIR_NAME = ".table_cache"
+CANDIDATE_ENCODINGS = ["utf-8", "gb18030"]
+FALLBACK_ENCODING = ("utf-8", "replace")
+SNIFF_CHUNK = 1 << 20
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def _decodes(path, encoding):
+    decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(SNIFF_CHUNK)
+                if not chunk:
+                    decoder.decode(b"", final=True)
+                    return True
+                decoder.decode(chunk)
+    except UnicodeDecodeError:
+        return False
+
+
+def sniff_encoding(path):
+    """返回 (encoding, errors)；errors 为 "strict" 表示整文件可无损解码"""
+    with open(path, "rb") as f:
+        head = f.read(4)
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding, "strict"
+    for encoding in CANDIDATE_ENCODINGS:
+        if _decodes(path, encoding):
+            return encoding, "strict"
+    print(f"[WARN] {path}: no clean encoding found, decoding as utf-8 with replacement",
+          file=sys.stderr)
+    return FALLBACK_ENCODING
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(SNIFF_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class _HashIndex:
+    """path -> (size, mtime_ns, hash)，文件没变时不重复计算哈希"""
+
+    def __init__(self, cache_dir):
+        self.path = os.path.join(cache_dir, "index.json")
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def hash_of(self, source):
+        st = os.stat(source)
+        name = os.path.basename(source)
+        entry = self.entries.get(name)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["hash"]
+        digest = file_hash(source)
+        self.entries[name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp, self.path)
+        return digest
+
+
+def _restore_missing(df):
+    """Parquet 往返会把 object 列中的 NaN 变成 None，这里还原成 C 引擎的 NaN"""
+    import numpy as np
+
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def read_table(path, encoding=None, cache=True, **read_csv_kwargs):
+    """
+    读取 CSV 为 DataFrame
+    encoding=None 时自动探测；read_csv_kwargs 透传给 pandas.read_csv（也参与缓存 key）
+    """
+    import pandas as pd
+
+    sidecar = None
+    if cache and PARQUET_AVAILABLE:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+        os.makedirs(cache_dir, exist_ok=True)
+        options = json.dumps({"encoding": encoding, **read_csv_kwargs}, sort_keys=True, default=repr)
+        options_key = hashlib.sha256(options.encode("utf-8")).hexdigest()[:8]
+        source_key = _HashIndex(cache_dir).hash_of(path)[:16]
+        name = os.path.basename(path)
+        sidecar = os.path.join(cache_dir, f"{name}.{source_key}.{options_key}.parquet")
+        if os.path.exists(sidecar):
+            return _restore_missing(pd.read_parquet(sidecar))
+
+    if encoding is None:
+        encoding, errors = sniff_encoding(path)
+    else:
+        errors = "strict"
+    read_csv_kwargs.setdefault("engine", "c")
+    if read_csv_kwargs["engine"] == "c":
+        read_csv_kwargs.setdefault("low_memory", False)
+    df = pd.read_csv(path, encoding=encoding, encoding_errors=errors, **read_csv_kwargs)
+
+    if sidecar:
+        # 同一源文件同一参数的旧副本已失效
+        for stale in glob.glob(os.path.join(glob.escape(os.path.dirname(sidecar)),
+                                            f"{glob.escape(name)}.*.{options_key}.parquet")):
+            os.remove(stale)
+        tmp = sidecar + ".tmp"
+        try:
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, sidecar)
+        except Exception as e:
+            # 混合类型列等无法写成 Parquet，本次不缓存
+            print(f"[WARN] {path}: parquet cache skipped ({e})", file=sys.stderr)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return df
@@ -1,8 +1,31 @@
 import csv
+import json
+import os
+import re
+import time
+from collections import Counter, deque
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool
+
+from data_loader import sniff_encoding
 
 INPUT_FILE = "embodied_intelligence_app_candidates.csv"
 OUTPUT_FILE = "embodied_intelligence_app_filtered.csv"
 
+# 流式处理：每次读 / 过滤 / 写一个 chunk，内存与输入大小无关
+CHUNK_SIZE = 10000
+# 过滤进程数；1 为单进程，None 为 CPU 核数
+PROCESSES = 1
+
+# 规则统计（每条规则的命中数 / 耗时），每次运行后覆盖写入
+RULE_STATS_FILE = "curation_rule_stats.json"
+# 规则顺序："fixed" 按 RULES 定义顺序；"tuned" 按上次统计的 命中数/耗时 从高到低
+RULE_ORDER = "fixed"
+# 被删除的行及其命中的第一条规则写入旁路文件；None 不写
+EXPLAIN_FILE = "embodied_intelligence_app_excluded.csv"
+EXPLAIN_FIELDS = ["trackId", "trackName", "primaryGenre", "rule", "matched"]
+
 # ======================================================
 # 1. 强排除分类（primaryGenre）
 # ======================================================
@@ -135,63 +158,278 @@ EXCLUDED_NAME_KEYWORDS_ZH = [
 ]
 
 # ======================================================
-# 4. 排除逻辑
+# 4. 排除规则引擎
+# 每条规则有名字，按顺序求值，命中第一条即删除（短路）
+# 关键词表在导入时编译成一个正则（多模式一次扫描），
+# 分类用 frozenset 查找；判定结果与逐个 `kw in name` 完全一致
 # ======================================================
 
-def should_exclude(row):
-    # ---- Level 1: Genre ----
-    genre = (row.get("primaryGenre") or "").strip()
-    if genre in EXCLUDED_GENRES:
-        return True
+def compile_keywords(keywords):
+    """把关键词表编译成一个正则；空表返回 None（不匹配任何名字）"""
+    unique = sorted(set(keywords), key=len, reverse=True)
+    if not unique:
+        return None
+    return re.compile("|".join(re.escape(kw) for kw in unique))
+
+
+class Rule:
+    """
+    命名排除规则
+    exact=True : 字段 strip 后整体在 terms 中
+    exact=False: 字段（lower=True 时先转小写）包含任一 term
+    match(row) 返回命中的词，未命中返回 None
+    """
+
+    def __init__(self, name, field, terms, exact=False, lower=False):
+        self.name = name
+        self.field = field
+        self.exact = exact
+        self.lower = lower
+        self._terms = frozenset(terms)
+        self._regex = None if exact else compile_keywords(terms)
+
+    def match(self, row):
+        value = row.get(self.field) or ""
+        if self.exact:
+            value = value.strip()
+            return value if value in self._terms else None
+        if self._regex is None:
+            return None
+        m = self._regex.search(value.lower() if self.lower else value)
+        return m.group(0) if m else None
+
+
+RULES = [
+    Rule("genre", "primaryGenre", EXCLUDED_GENRES, exact=True),
+    # 英文关键词匹配小写后的名字，中文关键词匹配原名
+    Rule("name_en", "trackName", EXCLUDED_NAME_KEYWORDS_EN, lower=True),
+    Rule("name_zh", "trackName", EXCLUDED_NAME_KEYWORDS_ZH),
+]
 
-    # ---- Level 2: Track Name ----
-    track_name = row.get("trackName") or ""
-    track_name_lower = track_name.lower()
 
-    for kw in EXCLUDED_NAME_KEYWORDS_EN:
-        if kw in track_name_lower:
-            return True
+class RuleStats:
+    """每条规则的求值次数、命中数、累计耗时和命中词分布（可跨进程合并）"""
+
+    def __init__(self):
+        self.evaluated = Counter()
+        self.hits = Counter()
+        self.seconds = Counter()
+        self.terms = {}
+
+    def record(self, rule_name, seconds, term):
+        self.evaluated[rule_name] += 1
+        self.seconds[rule_name] += seconds
+        if term is not None:
+            self.hits[rule_name] += 1
+            self.terms.setdefault(rule_name, Counter())[term] += 1
+
+    def merge(self, other):
+        self.evaluated.update(other.evaluated)
+        self.hits.update(other.hits)
+        self.seconds.update(other.seconds)
+        for name, terms in other.terms.items():
+            self.terms.setdefault(name, Counter()).update(terms)
+
+    def to_dict(self):
+        return {
+            name: {
+                "evaluated": self.evaluated[name],
+                "hits": self.hits[name],
+                "seconds": round(self.seconds[name], 6),
+                "top_terms": self.terms.get(name, Counter()).most_common(20),
+            }
+            for name in self.evaluated
+        }
+
+
+class RuleEngine:
+
+    def __init__(self, rules, order=None):
+        by_name = {rule.name: rule for rule in rules}
+        names = [n for n in (order or []) if n in by_name]
+        # order 中没有列出的规则按原顺序排在后面
+        names += [rule.name for rule in rules if rule.name not in names]
+        self.rules = [by_name[n] for n in names]
+
+    @property
+    def order(self):
+        return [rule.name for rule in self.rules]
+
+    def evaluate(self, row, stats=None):
+        """返回第一条命中的 (规则名, 命中词)，都未命中返回 None"""
+        for rule in self.rules:
+            if stats is None:
+                term = rule.match(row)
+            else:
+                start = time.perf_counter()
+                term = rule.match(row)
+                stats.record(rule.name, time.perf_counter() - start, term)
+            if term is not None:
+                return rule.name, term
+        return None
+
+
+def tuned_order(stats_file, rules=RULES):
+    """
+    按上次统计的 命中数 / 耗时 从高到低排序：又便宜又常命中的规则先求值，
+    这样大部分被删除的行只需求值一条规则
+    """
+    if not os.path.exists(stats_file):
+        return [rule.name for rule in rules]
+    with open(stats_file, encoding="utf-8") as f:
+        stats = json.load(f).get("rules", {})
+
+    def score(rule):
+        s = stats.get(rule.name, {})
+        return s.get("hits", 0) / s["seconds"] if s.get("seconds") else 0.0
+
+    return [rule.name for rule in sorted(rules, key=score, reverse=True)]
+
+
+ENGINE = RuleEngine(RULES)
 
-    for kw in EXCLUDED_NAME_KEYWORDS_ZH:
-        if kw in track_name:
-            return True
 
-    return False
+def should_exclude(row):
+    return ENGINE.evaluate(row) is not None
 
 # ======================================================
-# 5. 主过滤流程
+# 5. 主过滤流程（分块流式，可选多进程，输出顺序与输入一致）
 # ======================================================
 
-def filter_apps():
-    with open(
-        INPUT_FILE,
-        newline="",
-        encoding="utf-8",
-        errors="ignore"   # <<< 关键修复点
-    ) as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-
-    kept = []
+def read_chunks(reader, chunk_size):
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def filter_chunk(rows, order=None, explain=False):
+    """
+    返回 (保留的行, 删除数, 删除说明, 规则统计)
+    order 随任务一起传给子进程，保证各进程规则顺序一致
+    """
+    engine = RuleEngine(RULES, order) if order else ENGINE
+    stats = RuleStats()
+    kept, explained = [], []
     removed = 0
 
     for row in rows:
-        if should_exclude(row):
-            removed += 1
-        else:
+        hit = engine.evaluate(row, stats)
+        if hit is None:
             kept.append(row)
+            continue
+        removed += 1
+        if explain:
+            explained.append({
+                "trackId": row.get("trackId"),
+                "trackName": row.get("trackName"),
+                "primaryGenre": row.get("primaryGenre"),
+                "rule": hit[0],
+                "matched": hit[1],
+            })
+    return kept, removed, explained, stats
+
+
+def imap_bounded(pool, func, chunks, max_pending):
+    """
+    按顺序返回 func(chunk) 的结果；最多 max_pending 个 chunk 在途
+    （Pool.imap 会一次性读完整个输入，无法保证常量内存）
+    """
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.apply_async(func, (chunk,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def print_rule_stats(stats, order):
+    print("=== Rule Stats ===")
+    print(f"{'rule':<10} {'evaluated':>10} {'hits':>8} {'hit%':>7} {'time(ms)':>10} {'us/row':>8}  top matches")
+    for name in order:
+        evaluated, hits, seconds = stats.evaluated[name], stats.hits[name], stats.seconds[name]
+        hit_rate = hits / evaluated * 100 if evaluated else 0.0
+        per_row = seconds / evaluated * 1e6 if evaluated else 0.0
+        top = ", ".join(f"{t}({n})" for t, n in stats.terms.get(name, Counter()).most_common(5))
+        print(f"{name:<10} {evaluated:>10} {hits:>8} {hit_rate:>6.1f}% "
+              f"{seconds * 1000:>10.1f} {per_row:>8.2f}  {top}")
+
+
+def filter_apps(input_file=INPUT_FILE, output_file=OUTPUT_FILE,
+                chunk_size=CHUNK_SIZE, processes=PROCESSES,
+                explain_file=EXPLAIN_FILE, stats_file=RULE_STATS_FILE,
+                rule_order=RULE_ORDER):
+    total = removed = kept = 0
+    stats = RuleStats()
+
+    order = tuned_order(stats_file) if rule_order == "tuned" else [rule.name for rule in RULES]
+    print(f"[INFO] Rule order: {' -> '.join(order)}")
+    chunk_fn = partial(filter_chunk, order=order, explain=bool(explain_file))
+
+    # 编码自动探测；无法无损解码时用替换字符，不再静默丢字节
+    encoding, errors = sniff_encoding(input_file)
 
-    with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-        writer.writeheader()
-        for row in kept:
-            writer.writerow(row)
+    with open(
+        input_file,
+        newline="",
+        encoding=encoding,
+        errors=errors
+    ) as fin, open(output_file, "w", newline="", encoding="utf-8") as fout:
+        reader = csv.DictReader(fin)
+        fieldnames = reader.fieldnames
+
+        if not fieldnames:
+            print(f"[WARN] {input_file} is empty, nothing to filter")
+        else:
+            writer = csv.DictWriter(fout, fieldnames=fieldnames)
+            writer.writeheader()
+
+            explain_f = explain_writer = None
+            if explain_file:
+                explain_f = open(explain_file, "w", newline="", encoding="utf-8")
+                explain_writer = csv.DictWriter(explain_f, fieldnames=EXPLAIN_FIELDS)
+                explain_writer.writeheader()
+
+            chunks = read_chunks(reader, chunk_size)
+            workers = processes or os.cpu_count() or 1
+
+            def consume(results):
+                nonlocal total, removed, kept
+                for kept_rows, removed_count, explained, chunk_stats in results:
+                    writer.writerows(kept_rows)
+                    if explain_writer:
+                        explain_writer.writerows(explained)
+                    stats.merge(chunk_stats)
+                    kept += len(kept_rows)
+                    removed += removed_count
+                    total += len(kept_rows) + removed_count
+
+            try:
+                if workers == 1:
+                    consume(map(chunk_fn, chunks))
+                else:
+                    with Pool(workers) as pool:
+                        consume(imap_bounded(pool, chunk_fn, chunks, workers * 2))
+            finally:
+                if explain_f:
+                    explain_f.close()
 
     print("=== Filtering Summary ===")
-    print(f"Total input apps : {len(rows)}")
+    print(f"Total input apps : {total}")
     print(f"Removed apps     : {removed}")
-    print(f"Kept apps        : {len(kept)}")
-    print(f"Output saved to  : {OUTPUT_FILE}")
+    print(f"Kept apps        : {kept}")
+    print(f"Output saved to  : {output_file}")
+    if explain_file and total:
+        print(f"Explain saved to : {explain_file}")
+
+    if total:
+        print_rule_stats(stats, order)
+        if stats_file:
+            with open(stats_file, "w", encoding="utf-8") as f:
+                json.dump({"order": order, "total": total, "rules": stats.to_dict()},
+                          f, ensure_ascii=False, indent=2)
 
 # ======================================================
 # 6. Entry
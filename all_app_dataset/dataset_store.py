@@ -0,0 +1,283 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+from data_loader import file_hash, read_table
+
+# ======================================================
+# 分区列式数据集存储（替代各阶段之间反复写读的 CSV）
+# 目录结构：
+#   dataset_store/<table>/_manifest.json
+#   dataset_store/<table>/stage=<stage>/version=<n>/part-00000.parquet
+# - table   : 数据表，如 candidates / target_match
+# - stage   : 处理阶段，如 raw / filtered / with_description
+# - version : 每次 write 生成新版本，旧版本保留；append 给已有版本追加分区
+#             （追加的分区转换成第一个分区的 schema，同一版本内各分区类型一致）
+# 读取时可只取需要的列；需要 pyarrow。单进程写入。
+# 写入时可记录来源 CSV 的 size / mtime / 哈希；read_or_csv 发现 CSV
+# 与记录不符（或比 store 版本新）时改读 CSV，避免读到过期快照
+# 保留策略：内容与最新版本相同时不写新版本；每个阶段只保留最近 KEEP_VERSIONS 个版本
+# ======================================================
+
+STORE_ROOT = "dataset_store"
+MANIFEST = "_manifest.json"
+KEEP_VERSIONS = 3
+
+# 现有 CSV -> (table, stage)，用于一次性导入
+KNOWN_CSV_TABLES = {
+    "embodied_intelligence_app_candidates.csv": ("candidates", "raw"),
+    "embodied_intelligence_app_filtered.csv": ("candidates", "filtered"),
+    "embodied_intelligence_app_with_description.csv": ("candidates", "with_description"),
+    "target_matched_full.csv": ("target_match", "full"),
+    "target_matched_only.csv": ("target_match", "matched"),
+    "target_unmatched_only.csv": ("target_match", "unmatched"),
+    "target_matched_from_unmatched.csv": ("target_match", "matched_from_unmatched"),
+    "target_still_unmatched.csv": ("target_match", "still_unmatched"),
+    "all_matched.csv": ("all_matched", "raw"),
+}
+
+
+def _arrow_safe(df):
+    """object 列中混有数字和字符串时 Arrow 无法推断类型，非空值统一转成字符串"""
+    import pandas as pd
+
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed"):
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+
+def _content_hash(df):
+    """列名 + 逐行哈希；含不可哈希的值（list 等）时返回 None，不做去重"""
+    import pandas as pd
+
+    h = hashlib.sha256("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    try:
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    except TypeError:
+        return None
+    return h.hexdigest()
+
+
+def _source_info(path):
+    st = os.stat(path)
+    return {
+        "path": os.path.basename(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "hash": file_hash(path),
+    }
+
+
+class DatasetStore:
+
+    def __init__(self, root=STORE_ROOT, keep_versions=KEEP_VERSIONS):
+        self.root = root
+        self.keep_versions = keep_versions
+
+    # ---------- manifest ----------
+    def _table_dir(self, table):
+        return os.path.join(self.root, table)
+
+    def _version_dir(self, table, stage, version):
+        return os.path.join(self._table_dir(table), f"stage={stage}", f"version={version}")
+
+    def manifest(self, table):
+        path = os.path.join(self._table_dir(table), MANIFEST)
+        if not os.path.exists(path):
+            return {"stages": {}}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_manifest(self, table, manifest):
+        path = os.path.join(self._table_dir(table), MANIFEST)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def tables(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, MANIFEST))
+        )
+
+    def stages(self, table):
+        return list(self.manifest(table)["stages"])
+
+    def latest_version(self, table, stage):
+        stage_info = self.manifest(table)["stages"].get(stage)
+        return stage_info["latest"] if stage_info else None
+
+    # ---------- 写 ----------
+    def _part_path(self, table, stage, version, part):
+        return os.path.join(self._version_dir(table, stage, version), f"part-{part:05d}.parquet")
+
+    def _write_part(self, table, stage, version, df, part):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        directory = self._version_dir(table, stage, version)
+        os.makedirs(directory, exist_ok=True)
+        path = self._part_path(table, stage, version, part)
+        tmp = os.path.join(directory, f".part-{part:05d}.parquet.tmp")
+        try:
+            arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            arrow_table = pa.Table.from_pandas(_arrow_safe(df), preserve_index=False)
+
+        if part == 0:
+            # 全空列推断为 null 类型，后续分区无法转换过来，先定为字符串
+            schema = pa.schema([
+                pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                for f in arrow_table.schema
+            ], metadata=arrow_table.schema.metadata)
+        else:
+            schema = pq.read_schema(self._part_path(table, stage, version, 0))
+            missing = set(schema.names) - set(arrow_table.schema.names)
+            if missing:
+                raise ValueError(f"{table}/{stage} v{version}: part {part} is missing columns {sorted(missing)}")
+            arrow_table = arrow_table.select(schema.names)
+        arrow_table = arrow_table.cast(schema)
+        pq.write_table(arrow_table, tmp)
+        os.replace(tmp, path)
+        return arrow_table.schema.names
+
+    def write(self, table, df, stage="raw", note="", source=None):
+        """
+        写入新版本，返回版本号；source 为同一份数据的 CSV 路径（用于过期检查）
+        内容与最新版本相同时不写，返回最新版本号
+        """
+        manifest = self.manifest(table)
+        stage_info = manifest["stages"].setdefault(stage, {"latest": 0, "versions": {}})
+        digest = _content_hash(df)
+
+        latest = stage_info["versions"].get(str(stage_info["latest"]))
+        if digest and latest and latest.get("content_hash") == digest:
+            # 只刷新来源记录，CSV 重写后仍视为与 store 一致
+            if source:
+                latest["source"] = _source_info(source)
+            latest["updated_ts"] = time.time()
+            self._save_manifest(table, manifest)
+            return stage_info["latest"]
+
+        version = stage_info["latest"] + 1
+        columns = self._write_part(table, stage, version, df, 0)
+        stage_info["versions"][str(version)] = {
+            "rows": len(df),
+            "parts": 1,
+            "columns": columns,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "updated_ts": time.time(),
+            "content_hash": digest,
+            "note": note,
+        }
+        if source:
+            stage_info["versions"][str(version)]["source"] = _source_info(source)
+        stage_info["latest"] = version
+        self._prune(table, stage, stage_info)
+        self._save_manifest(table, manifest)
+        return version
+
+    def _prune(self, table, stage, stage_info):
+        """只保留最近 keep_versions 个版本"""
+        if not self.keep_versions:
+            return
+        versions = sorted(int(v) for v in stage_info["versions"])
+        for version in versions[:-self.keep_versions]:
+            shutil.rmtree(self._version_dir(table, stage, version), ignore_errors=True)
+            del stage_info["versions"][str(version)]
+
+    def append(self, table, df, stage="raw", version=None):
+        """给已有版本（默认最新）追加一个分区；stage 不存在时等同 write"""
+        manifest = self.manifest(table)
+        stage_info = manifest["stages"].get(stage)
+        if not stage_info:
+            return self.write(table, df, stage)
+
+        version = version or stage_info["latest"]
+        info = stage_info["versions"][str(version)]
+        self._write_part(table, stage, version, df, info["parts"])
+        info["parts"] += 1
+        info["rows"] += len(df)
+        info["updated_ts"] = time.time()
+        info["content_hash"] = None     # 已不是整版本的哈希
+        self._save_manifest(table, manifest)
+        return version
+
+    # ---------- 读 ----------
+    def read(self, table, stage="raw", version=None, columns=None):
+        """读取某阶段某版本（默认最新）；columns 只读取需要的列"""
+        import pandas as pd
+
+        version = version or self.latest_version(table, stage)
+        if version is None:
+            raise KeyError(f"{table}/{stage} not found in {self.root}")
+        return pd.read_parquet(self._version_dir(table, stage, version), columns=columns)
+
+    def is_current(self, table, stage, csv_path):
+        """
+        store 最新版本是否仍与 csv_path 一致：
+        - 记录了来源：size / mtime 相同，或内容哈希相同
+        - 没记录来源：CSV 不比该版本最后一次写入新
+        CSV 不存在时视为一致
+        """
+        version = self.latest_version(table, stage)
+        if version is None:
+            return False
+        if not os.path.exists(csv_path):
+            return True
+        info = self.manifest(table)["stages"][stage]["versions"][str(version)]
+        source = info.get("source")
+        st = os.stat(csv_path)
+        if source:
+            if source["size"] == st.st_size and source["mtime_ns"] == st.st_mtime_ns:
+                return True
+            return source["size"] == st.st_size and source["hash"] == file_hash(csv_path)
+        return st.st_mtime <= info.get("updated_ts", 0)
+
+    def read_or_csv(self, table, stage, csv_path, columns=None):
+        """store 中该阶段的最新版本仍与 CSV 一致就读 store，否则读 CSV（只保留 columns）"""
+        if self.is_current(table, stage, csv_path):
+            return self.read(table, stage, columns=columns)
+        if self.latest_version(table, stage) is not None:
+            print(f"[INFO] {csv_path} is newer than {table}/{stage}, reading CSV", file=sys.stderr)
+        df = read_table(csv_path)
+        return df[columns] if columns else df
+
+    def import_csv(self, path, table, stage):
+        df = read_table(path)
+        return self.write(table, df, stage, note=f"imported from {os.path.basename(path)}", source=path)
+
+
+def import_known_csvs(store, directory="."):
+    for name, (table, stage) in KNOWN_CSV_TABLES.items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            continue
+        version = store.import_csv(path, table, stage)
+        print(f"[INFO] {name} -> {table}/{stage} version {version}")
+
+
+def print_summary(store):
+    for table in store.tables():
+        for stage, info in store.manifest(table)["stages"].items():
+            latest = info["versions"][str(info["latest"])]
+            print(f"{table:<14} {stage:<24} v{info['latest']:<3} "
+                  f"rows={latest['rows']:<8} parts={latest['parts']:<3} "
+                  f"columns={len(latest['columns'])}")
+
+
+if __name__ == "__main__":
+    # python dataset_store.py import   导入已知的阶段 CSV
+    # python dataset_store.py          列出所有表 / 阶段的最新版本
+    store = DatasetStore()
+    if sys.argv[1:2] == ["import"]:
+        import_known_csvs(store)
+    print_summary(store)
@@ -0,0 +1,310 @@
+import csv
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from data_loader import sniff_encoding
+from fuzzy_index import FuzzyTitleIndex
+from title_normalize import title_key, title_similarity
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "GooglePlay_Scraper"))
+from detail_store import DetailStore  # noqa: E402
+
+# ======================================================
+# 跨商店实体对齐：App Store (trackId / bundleId / sellerName)
+#              <-> Google Play (appId / developer)
+# 1. blocking：只对以下任一条件成立的 (App Store, Google Play) 对打分
+#    - 规范化后的开发者名相同
+#    - bundleId / 包名相同，或反向域名前缀（com.dji）相同
+#    - 标题 n-gram 近似（fuzzy_index 的 top-k）
+# 2. 打分：标题、开发者、包名相似度加权；包名完全相同直接视为同一 app
+# 3. 按分数从高到低一对一分配，写出持久化映射表
+#    重复运行时已映射的 app 保留，只对新 app 对齐
+# ======================================================
+
+APPSTORE_FILE = "embodied_intelligence_app_candidates.csv"
+GP_STORE_FILE = "GooglePlay_Scraper/app_details.jsonl"
+GP_LEGACY_FILES = ["GooglePlay_Scraper/app_details.json", "GooglePlay_Scraper/app_details2.json"]
+MAPPING_FILE = "cross_store_app_map.csv"
+
+MAPPING_FIELDS = [
+    "trackId", "bundleId", "appStoreTitle", "sellerName",
+    "appId", "googlePlayTitle", "developer",
+    "score", "title_score", "developer_score", "bundle_score", "blocks",
+]
+
+# 打分权重与阈值
+TITLE_WEIGHT = 0.5
+DEVELOPER_WEIGHT = 0.3
+BUNDLE_WEIGHT = 0.2
+BUNDLE_EXACT_SCORE = 0.95
+MIN_SCORE = 0.75
+TITLE_TOP_K = 5
+TITLE_MIN_SCORE = 0.6
+
+# 开发者名中不区分主体的后缀
+_COMPANY_SUFFIX_RE = re.compile(
+    r"\b(co|company|corp|corporation|inc|incorporated|llc|ltd|limited|gmbh|"
+    r"s ?a|s ?r ?l|b ?v|ag|plc|pte|pty|technology|technologies|tech)\b"
+)
+_SPACES_RE = re.compile(r"\s+")
+# 包名中没有区分度的段
+_GENERIC_BUNDLE_PARTS = {"com", "cn", "net", "org", "io", "app", "apps", "android", "ios", "mobile"}
+
+
+def developer_key(name):
+    key = _COMPANY_SUFFIX_RE.sub(" ", title_key(name))
+    return _SPACES_RE.sub(" ", key).strip()
+
+
+def bundle_prefix(bundle):
+    parts = (bundle or "").lower().split(".")
+    return ".".join(parts[:2]) if len(parts) >= 3 else ""
+
+
+def bundle_similarity(a, b):
+    a, b = (a or "").lower(), (b or "").lower()
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    pa = set(a.split(".")) - _GENERIC_BUNDLE_PARTS
+    pb = set(b.split(".")) - _GENERIC_BUNDLE_PARTS
+    return len(pa & pb) / len(pa | pb) if pa and pb else 0.0
+
+
+def developer_similarity(a, b):
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+# ================== 读取两侧记录 ==================
+def load_appstore(path=APPSTORE_FILE):
+    """
+    App Store 记录：爬虫候选 CSV（trackId / bundleId / trackName / sellerName）
+    或 app-store-scraper JSON（id / appId / title / developer）
+    """
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        rows = data if isinstance(data, list) else [data]
+        fields = ("id", "appId", "title", "developer")
+    else:
+        encoding, errors = sniff_encoding(path)
+        with open(path, newline="", encoding=encoding, errors=errors) as f:
+            rows = list(csv.DictReader(f))
+        fields = ("trackId", "bundleId", "trackName", "sellerName")
+
+    records = {}
+    for row in rows:
+        track_id = str(row.get(fields[0]) or "").strip()
+        if not track_id or track_id in records:
+            continue
+        records[track_id] = {
+            "id": track_id,
+            "bundle": row.get(fields[1]) or "",
+            "title": row.get(fields[2]) or "",
+            "developer": row.get(fields[3]) or "",
+        }
+    return list(records.values())
+
+
+def load_google_play(store_file=GP_STORE_FILE, legacy_files=GP_LEGACY_FILES):
+    """Google Play 记录：优先读 DetailStore，没有时读旧版整文件 JSON"""
+    if os.path.exists(store_file):
+        rows = DetailStore(store_file).iter_records()
+    else:
+        rows = []
+        for path in legacy_files:
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                rows.extend(data if isinstance(data, list) else [data])
+
+    records = {}
+    for row in rows:
+        if not isinstance(row, dict) or "error" in row or not row.get("appId"):
+            continue
+        records[row["appId"]] = {
+            "id": row["appId"],
+            "bundle": row["appId"],
+            "title": row.get("title") or "",
+            "developer": row.get("developer") or "",
+        }
+    return list(records.values())
+
+
+# ================== 映射表 ==================
+def load_mapping(path=MAPPING_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def save_mapping(rows, path=MAPPING_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=MAPPING_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, path)
+
+
+class CrossStoreMap:
+    """映射表的索引查询：trackId / bundleId -> appId，appId -> trackId"""
+
+    def __init__(self, rows):
+        self.by_track_id = {r["trackId"]: r for r in rows}
+        self.by_bundle_id = {r["bundleId"]: r for r in rows if r.get("bundleId")}
+        self.by_app_id = {r["appId"]: r for r in rows}
+
+    @classmethod
+    def load(cls, path=MAPPING_FILE):
+        return cls(load_mapping(path))
+
+    def app_id_for(self, track_id=None, bundle_id=None):
+        row = self.by_track_id.get(str(track_id)) or self.by_bundle_id.get(bundle_id)
+        return row["appId"] if row else None
+
+    def track_id_for(self, app_id):
+        row = self.by_app_id.get(app_id)
+        return row["trackId"] if row else None
+
+
+# ================== 对齐 ==================
+def candidate_pairs(as_records, gp_records):
+    """blocking：返回 {(as_idx, gp_idx): set(block 名)}"""
+    by_developer = defaultdict(list)
+    by_bundle = defaultdict(list)
+    by_prefix = defaultdict(list)
+    for j, gp in enumerate(gp_records):
+        if gp["dev_key"]:
+            by_developer[gp["dev_key"]].append(j)
+        by_bundle[gp["bundle"].lower()].append(j)
+        if gp["prefix"]:
+            by_prefix[gp["prefix"]].append(j)
+
+    title_index = FuzzyTitleIndex(gp["title"] for gp in gp_records)
+
+    pairs = defaultdict(set)
+    for i, rec in enumerate(as_records):
+        for j in by_developer.get(rec["dev_key"], []) if rec["dev_key"] else []:
+            pairs[(i, j)].add("developer")
+        for j in by_bundle.get(rec["bundle"].lower(), []) if rec["bundle"] else []:
+            pairs[(i, j)].add("bundle")
+        for j in by_prefix.get(rec["prefix"], []) if rec["prefix"] else []:
+            pairs[(i, j)].add("bundle_prefix")
+        for hit in title_index.query(rec["title"], k=TITLE_TOP_K, min_score=TITLE_MIN_SCORE):
+            for j in hit["positions"]:
+                pairs[(i, j)].add("title")
+    return pairs
+
+
+def score_pair(rec, gp):
+    title_score = title_similarity(rec["title"], gp["title"])
+    developer_score = developer_similarity(rec["dev_key"], gp["dev_key"])
+    bundle_score = bundle_similarity(rec["bundle"], gp["bundle"])
+    score = (TITLE_WEIGHT * title_score
+             + DEVELOPER_WEIGHT * developer_score
+             + BUNDLE_WEIGHT * bundle_score)
+    if bundle_score == 1.0:
+        score = max(score, BUNDLE_EXACT_SCORE)
+    return score, title_score, developer_score, bundle_score
+
+
+def resolve(as_records, gp_records, existing=()):
+    """
+    返回 (新映射行, 统计)；existing 中已映射的 trackId / appId 不再参与
+    """
+    mapped_as = {r["trackId"] for r in existing}
+    mapped_gp = {r["appId"] for r in existing}
+    as_records = [r for r in as_records if r["id"] not in mapped_as]
+    gp_records = [r for r in gp_records if r["id"] not in mapped_gp]
+
+    for rec in as_records + gp_records:
+        rec["dev_key"] = developer_key(rec["developer"])
+        rec["prefix"] = bundle_prefix(rec["bundle"])
+
+    pairs = candidate_pairs(as_records, gp_records)
+
+    scored = []
+    for (i, j), blocks in pairs.items():
+        score, t, d, b = score_pair(as_records[i], gp_records[j])
+        if score >= MIN_SCORE:
+            scored.append((score, t, d, b, i, j, blocks))
+
+    # 一对一贪心分配：同名但开发者不同的 app 分数低，不会抢占正确的配对
+    scored.sort(key=lambda x: (-x[0], x[4], x[5]))
+    used_as, used_gp = set(), set()
+    rows = []
+    for score, t, d, b, i, j, blocks in scored:
+        if i in used_as or j in used_gp:
+            continue
+        used_as.add(i)
+        used_gp.add(j)
+        rec, gp = as_records[i], gp_records[j]
+        rows.append({
+            "trackId": rec["id"],
+            "bundleId": rec["bundle"],
+            "appStoreTitle": rec["title"],
+            "sellerName": rec["developer"],
+            "appId": gp["id"],
+            "googlePlayTitle": gp["title"],
+            "developer": gp["developer"],
+            "score": round(score, 4),
+            "title_score": round(t, 4),
+            "developer_score": round(d, 4),
+            "bundle_score": round(b, 4),
+            "blocks": "|".join(sorted(blocks)),
+        })
+
+    stats = {
+        "app_store": len(as_records),
+        "google_play": len(gp_records),
+        "pairs_scored": len(pairs),
+        "brute_force_pairs": len(as_records) * len(gp_records),
+        "mapped": len(rows),
+    }
+    return rows, stats
+
+
+def ambiguous_titles(records):
+    """同一 title 对应多个不同开发者：按 title 合并时会互相覆盖"""
+    developers = defaultdict(set)
+    for rec in records:
+        key = title_key(rec["title"])
+        if key:
+            developers[key].add(developer_key(rec["developer"]))
+    return {key: devs for key, devs in developers.items() if len(devs) > 1}
+
+
+def build_mapping(appstore_file=APPSTORE_FILE, mapping_file=MAPPING_FILE):
+    as_records = load_appstore(appstore_file)
+    gp_records = load_google_play()
+    existing = load_mapping(mapping_file)
+
+    new_rows, stats = resolve(as_records, gp_records, existing)
+    save_mapping(existing + new_rows, mapping_file)
+
+    ambiguous = ambiguous_titles(as_records + gp_records)
+    print("=== Entity Resolution Summary ===")
+    print(f"App Store apps (unmapped) : {stats['app_store']}")
+    print(f"Google Play apps (unmapped): {stats['google_play']}")
+    print(f"Pairs scored              : {stats['pairs_scored']} "
+          f"(brute force would be {stats['brute_force_pairs']})")
+    print(f"Newly mapped              : {stats['mapped']}")
+    print(f"Total mapped              : {len(existing) + len(new_rows)}")
+    print(f"Titles shared by different developers: {len(ambiguous)}")
+    print(f"Mapping saved to          : {mapping_file}")
+    return existing + new_rows
+
+
+if __name__ == "__main__":
+    build_mapping(*sys.argv[1:2])
@@ -0,0 +1,121 @@
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+from title_normalize import title_key
+
+# ======================================================
+# 标题近似匹配索引（精确匹配之后的剩余 title 用）
+# - 字符 n-gram 倒排索引做 blocking：只比较和 query 共享稀有 n-gram 的标题
+# - 候选按共享 n-gram 数粗排，再用 SequenceMatcher 精排
+# - 分数 0~1 作为 match_confidence，与 search.py 的置信度同一口径
+# ======================================================
+
+NGRAM = 3
+DEFAULT_TOP_K = 3
+DEFAULT_MIN_SCORE = 0.6
+# 每个 query 最多精排的候选数
+MAX_CANDIDATES = 50
+# 出现在超过该比例标题中的 n-gram 太常见，不参与 blocking
+MAX_POSTING_RATIO = 0.05
+# 至少使用最稀有的这么多个 n-gram（防止所有 n-gram 都太常见时没有候选）
+MIN_GRAMS = 2
+
+
+def ngrams(key, n=NGRAM):
+    """首尾补空格后切 n-gram；短 key 也至少有一个 gram"""
+    padded = f" {key} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class FuzzyTitleIndex:
+
+    def __init__(self, titles, n=NGRAM):
+        """titles: 任意可迭代的标题；query 结果中的 positions 指向它的下标"""
+        self.n = n
+        self.keys = []                       # key id -> title_key
+        self.titles = []                     # key id -> 第一次出现的原标题
+        self.positions = []                  # key id -> 原始下标列表
+        self._key_ids = {}
+        self._postings = defaultdict(list)   # n-gram -> [key id]
+
+        for pos, title in enumerate(titles):
+            key = title_key(title)
+            if not key:
+                continue
+            key_id = self._key_ids.get(key)
+            if key_id is None:
+                key_id = self._key_ids[key] = len(self.keys)
+                self.keys.append(key)
+                self.titles.append(title)
+                self.positions.append([])
+                for gram in ngrams(key, n):
+                    self._postings[gram].append(key_id)
+            self.positions[key_id].append(pos)
+
+        self.max_postings = max(MAX_CANDIDATES, int(len(self.keys) * MAX_POSTING_RATIO))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _candidates(self, key, max_candidates):
+        postings = sorted(
+            (self._postings[g] for g in ngrams(key, self.n) if g in self._postings),
+            key=len
+        )
+        shared = Counter()
+        for i, plist in enumerate(postings):
+            if i >= MIN_GRAMS and len(plist) > self.max_postings:
+                break
+            shared.update(plist)
+        return [key_id for key_id, _ in shared.most_common(max_candidates)]
+
+    def query(self, title, k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE,
+              max_candidates=MAX_CANDIDATES):
+        """
+        返回最多 k 个候选，按分数从高到低：
+        [{"title", "positions", "match_confidence"}, ...]
+        """
+        key = title_key(title)
+        if not key:
+            return []
+
+        exact = self._key_ids.get(key)
+        scored = []
+        for key_id in self._candidates(key, max_candidates):
+            if key_id == exact:
+                score = 1.0
+            else:
+                score = SequenceMatcher(None, key, self.keys[key_id]).ratio()
+            if score >= min_score:
+                scored.append((score, key_id))
+
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        return [
+            {
+                "title": self.titles[key_id],
+                "positions": self.positions[key_id],
+                "match_confidence": round(score, 4),
+            }
+            for score, key_id in scored[:k]
+        ]
+
+
+def match_leftovers(queries, index, k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE):
+    """
+    对一批未匹配的 title 查询 index，展开成行：
+    {"query", "rank", "candidate", "position", "match_confidence"}
+    没有候选的 query 不输出
+    """
+    rows = []
+    for query in queries:
+        for rank, hit in enumerate(index.query(query, k=k, min_score=min_score), start=1):
+            rows.append({
+                "query": query,
+                "rank": rank,
+                "candidate": hit["title"],
+                "position": hit["positions"][0],
+                "match_confidence": hit["match_confidence"],
+            })
+    return rows
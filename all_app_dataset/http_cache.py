@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+# ======================================================
+# 本地 HTTP 响应缓存（iTunes search / lookup 共用）
+# - key   : sha256(endpoint + 规范化后的参数)
+# - TTL   : 过期条目视为未命中
+# - 容量  : 超过 max_bytes 时按最久未写入优先淘汰
+# - cache_only : 只读缓存，未命中直接抛 CacheMiss，不发网络请求
+# ======================================================
+
+DEFAULT_CACHE_DIR = ".http_cache"
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600      # 30 天
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024    # 1 GB
+
+
+class CacheMiss(Exception):
+    """cache_only 模式下请求了缓存中不存在的响应"""
+
+
+def normalize_params(params):
+    """参数名小写、值转字符串并去首尾空白，保证同一请求得到同一 key"""
+    return {
+        str(k).strip().lower(): str(v).strip()
+        for k, v in (params or {}).items()
+        if v is not None
+    }
+
+
+def cache_key(endpoint, params):
+    raw = json.dumps(
+        {"endpoint": endpoint, "params": normalize_params(params)},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+
+    def __init__(
+        self,
+        cache_dir=DEFAULT_CACHE_DIR,
+        ttl_seconds=DEFAULT_TTL_SECONDS,
+        max_bytes=DEFAULT_MAX_BYTES,
+        cache_only=False
+    ):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.cache_only = cache_only
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None   # 首次写入时再扫描目录
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    # ---------- 读取 ----------
+    def get(self, endpoint, params):
+        """命中返回 payload；未命中或已过期返回 None"""
+        path = self._path(cache_key(endpoint, params))
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if self.ttl_seconds is not None:
+            if time.time() - entry.get("fetched_at", 0) > self.ttl_seconds:
+                return None
+        return entry.get("payload")
+
+    # ---------- 写入 ----------
+    def put(self, endpoint, params, payload):
+        key = cache_key(endpoint, params)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        data = json.dumps(
+            {
+                "endpoint": endpoint,
+                "params": normalize_params(params),
+                "fetched_at": time.time(),
+                "payload": payload,
+            },
+            ensure_ascii=False
+        ).encode("utf-8")
+
+        # 先写临时文件再原子替换，避免并发读到半个文件
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+
+        with self._lock:
+            # 覆盖已有条目时先减去旧文件大小，避免重复计数
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp, path)
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(data) - replaced
+            if self.max_bytes and self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def fetch(self, endpoint, params, fetch_fn):
+        """
+        缓存优先：命中直接返回；未命中调用 fetch_fn() 取网络结果并写入缓存
+        """
+        payload = self.get(endpoint, params)
+        if payload is not None:
+            with self._lock:
+                self.hits += 1
+            return payload
+
+        with self._lock:
+            self.misses += 1
+        if self.cache_only:
+            raise CacheMiss(f"{endpoint} {normalize_params(params)}")
+
+        payload = fetch_fn()
+        self.put(endpoint, params, payload)
+        return payload
+
+    # ---------- 容量淘汰 ----------
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield st.st_mtime, st.st_size, path
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """按写入时间从旧到新删除，直到降到容量的 90%"""
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in sorted(self._entries()):
+            if self._total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._total_bytes -= size
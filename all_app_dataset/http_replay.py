@@ -0,0 +1,119 @@
+import atexit
+import gzip
+import json
+import os
+import sys
+import threading
+import zlib
+
+from http_cache import cache_key, normalize_params
+
+# ======================================================
+# 录制 / 回放模式（离线、可复现的端到端运行）
+# 通过环境变量切换，所有联网入口共用：
+#   EAI_HTTP_MODE    = off（默认）| record | replay
+#   EAI_HTTP_ARCHIVE = 归档路径（默认 http_archive.jsonl.gz）
+# record : 正常请求，并把 (endpoint, params) -> 响应 追加到 gzip JSONL 归档
+# replay : 只从归档读取，不联网、不限流、不 sleep；归档中没有的请求抛 ReplayMiss
+# ======================================================
+
+DEFAULT_ARCHIVE = "http_archive.jsonl.gz"
+MODES = ("off", "record", "replay")
+
+
+class ReplayMiss(Exception):
+    """replay 模式下请求了归档中不存在的响应"""
+
+
+class HttpReplay:
+
+    def __init__(self, mode="off", archive=DEFAULT_ARCHIVE):
+        if mode not in MODES:
+            raise ValueError(f"EAI_HTTP_MODE must be one of {MODES}, got {mode!r}")
+        self.mode = mode
+        self.archive = archive
+        self.entries = {}
+        self.recorded = 0
+        self.replayed = 0
+        self._lock = threading.Lock()
+        self._out = None
+
+        if mode == "replay":
+            self._load()
+            print(f"[replay] {len(self.entries)} responses loaded from {archive}")
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.environ.get("EAI_HTTP_MODE", "off").strip().lower() or "off",
+            os.environ.get("EAI_HTTP_ARCHIVE", DEFAULT_ARCHIVE),
+        )
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def _load(self):
+        if not os.path.exists(self.archive):
+            raise FileNotFoundError(f"replay archive not found: {self.archive}")
+        try:
+            with gzip.open(self.archive, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.entries[entry["key"]] = entry["response"]
+        except (EOFError, zlib.error, OSError) as e:
+            # 录制进程被中断时归档尾部可能不完整，已读到的部分照常使用
+            print(f"[replay] archive {self.archive} truncated ({e}), using what was read",
+                  file=sys.stderr)
+
+    def _write(self, key, endpoint, params, response):
+        line = json.dumps(
+            {
+                "key": key,
+                "endpoint": endpoint,
+                "params": normalize_params(params),
+                "response": response,
+            },
+            ensure_ascii=False,
+            default=str
+        )
+        with self._lock:
+            if self._out is None:
+                # 追加模式会生成多成员 gzip，gzip.open 可以连续读取
+                self._out = gzip.open(self.archive, "at", encoding="utf-8")
+                atexit.register(self.close)
+            self._out.write(line + "\n")
+            self.recorded += 1
+
+    def call(self, endpoint, params, fetch_fn):
+        """
+        联网入口的统一包装：
+        endpoint 为 URL 或函数名，params 为决定响应的全部参数
+        """
+        if self.mode == "off":
+            return fetch_fn()
+
+        key = cache_key(endpoint, params)
+        if self.mode == "replay":
+            if key not in self.entries:
+                raise ReplayMiss(f"{endpoint} {normalize_params(params)}")
+            with self._lock:
+                self.replayed += 1
+            return self.entries[key]
+
+        response = fetch_fn()
+        self._write(key, endpoint, params, response)
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._out is not None:
+                self._out.close()
+                self._out = None
+
+
+# 进程内共享的实例
+HTTP_REPLAY = HttpReplay.from_env()
@@ -1,7 +1,13 @@
 import csv
-import time
 import requests
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from data_loader import sniff_encoding
+from http_cache import CacheMiss, ResponseCache
+from http_replay import HTTP_REPLAY, ReplayMiss
+from rate_limit import TokenBucket
+from retry import RetryPolicy, classify_error
 
 # ======================================================
 # 1. 配置
@@ -16,38 +22,180 @@ HEADERS = {
     "User-Agent": "Embodied-Intelligence-Academic-Lookup/1.0"
 }
 
-BATCH_SIZE = 20            # Apple 官方可接受
+BATCH_SIZE = 100           # 每次 lookup 的 id 数（接口单次最多约 200 个）
 RATE_LIMIT_SECONDS = 2.5   # 保守限流（≈ 24 req/min）
+MAX_WORKERS = 4            # 并发 lookup worker，共享同一个令牌桶
+
+# 按 app 被发现时的 country 选择 storefront；该店查不到的 id 依次到以下 storefront 补查
+DEFAULT_COUNTRY = "us"
+FALLBACK_COUNTRIES = ["us", "cn", "jp", "kr", "gb", "de", "fr"]
+
+MAX_ATTEMPTS = 4           # 单个批次内的重试次数
+RETRY_ROUNDS = 2           # 被限流且重试用尽的批次整批再试的轮数
+
+ENRICHED_FIELDS = [
+    # ---- 原始字段 ----
+    "trackId", "bundleId", "trackName", "sellerName", "primaryGenre", "country",
+    # ---- Lookup 扩展字段 ----
+    "genres", "description", "version", "releaseNotes",
+    "supportedDevices", "minimumOsVersion", "languages",
+    "lookupCountry",
+]
+
+# 本地响应缓存（与 app_store_crawl.py 共用同一目录）
+CACHE_DIR = ".http_cache"
+CACHE_TTL_SECONDS = 30 * 24 * 3600
+CACHE_MAX_BYTES = 1024 * 1024 * 1024
+CACHE_ONLY = False   # True：只读缓存，未命中的批次直接记为失败
 
 # ======================================================
 # 2. Lookup API
 # ======================================================
 
-def lookup_by_track_ids(track_ids):
+# 只有真正发出的请求才限流，缓存命中的批次不再 sleep
+RATE_LIMITER = TokenBucket(1.0 / RATE_LIMIT_SECONDS, capacity=1)
+
+RESPONSE_CACHE = ResponseCache(
+    CACHE_DIR,
+    ttl_seconds=CACHE_TTL_SECONDS,
+    max_bytes=CACHE_MAX_BYTES,
+    cache_only=CACHE_ONLY
+)
+
+RETRY_POLICY = RetryPolicy(max_attempts=MAX_ATTEMPTS, limiter=RATE_LIMITER)
+
+
+def lookup_by_track_ids(track_ids, country=None):
     params = {
         "id": ",".join(track_ids),
         "entity": "software"
     }
-    r = requests.get(
-        LOOKUP_URL,
-        params=params,
-        headers=HEADERS,
-        timeout=20
+    if country:
+        params["country"] = country
+
+    def fetch():
+        RATE_LIMITER.acquire()
+        r = requests.get(
+            LOOKUP_URL,
+            params=params,
+            headers=HEADERS,
+            timeout=20
+        )
+        r.raise_for_status()
+        return r.json()
+
+    # 录制 / 回放包在最外层：replay 时不查缓存、不限流
+    payload = HTTP_REPLAY.call(
+        LOOKUP_URL, params, lambda: RESPONSE_CACHE.fetch(LOOKUP_URL, params, fetch)
     )
-    r.raise_for_status()
-    return r.json().get("results", [])
+    return payload.get("results", [])
+
+# ======================================================
+# 3. 自愈批量 Lookup
+# ======================================================
+
+class BatchOutcome:
+    def __init__(self):
+        self.items = {}       # trackId -> lookup 结果
+        self.countries = {}   # trackId -> 实际查到结果的 storefront
+        self.failed = set()   # 最终仍失败的 trackId
+        self.errors = []
+
+    def merge(self, other):
+        self.items.update(other.items)
+        self.countries.update(other.countries)
+        self.failed.update(other.failed)
+        self.errors.extend(other.errors)
+
+
+def lookup_batch(batch, country=None, outcome=None):
+    """
+    查询一个批次：
+    - 被限流 / 超时且重试用尽：在当前 worker 内整批再试一轮（最多 RETRY_ROUNDS 轮）
+    - 非瞬时错误（4xx 等，通常是某个异常 id 导致）：对半拆分递归重试，
+      一个坏 id 不会拖累同批其余 id
+    - 5xx / 超时等瞬时错误多轮重试后仍失败：整批记为失败，不拆分
+      （商店故障时拆分只会把一个批次放大成上百个请求）
+    """
+    outcome = outcome or BatchOutcome()
+    rounds = 0
+    while True:
+        try:
+            results = RETRY_POLICY.call(lookup_by_track_ids, batch, country)
+            break
+        except (CacheMiss, ReplayMiss) as e:
+            outcome.errors.append(str(e))
+            outcome.failed.update(batch)
+            return outcome
+        except Exception as e:
+            kind = classify_error(e)
+            if kind in ("throttled", "forbidden", "timeout", "connection", "server_error") \
+                    and rounds < RETRY_ROUNDS:
+                rounds += 1
+                RETRY_POLICY.stats.incr("retried")
+                continue
+            if len(batch) > 1 and kind in ("client_error", "other"):
+                RETRY_POLICY.stats.incr("split")
+                mid = len(batch) // 2
+                lookup_batch(batch[:mid], country, outcome)
+                lookup_batch(batch[mid:], country, outcome)
+                return outcome
+            RETRY_POLICY.stats.incr("gave_up")
+            outcome.errors.append(f"{batch[0]}..{batch[-1]} ({len(batch)} ids): {e}")
+            outcome.failed.update(batch)
+            return outcome
+
+    for item in results:
+        tid = str(item.get("trackId"))
+        outcome.items[tid] = item
+        outcome.countries[tid] = country
+    return outcome
+
+
+def lookup_job(job):
+    country, batch = job
+    return lookup_batch(batch, country)
+
+
+def split_batches(country, ids, batch_size):
+    return [(country, ids[i:i + batch_size]) for i in range(0, len(ids), batch_size)]
+
+
+def build_row(base, item, country):
+    return {
+        # ---- 原始字段 ----
+        "trackId": base.get("trackId"),
+        "bundleId": base.get("bundleId"),
+        "trackName": base.get("trackName"),
+        "sellerName": base.get("sellerName"),
+        "primaryGenre": base.get("primaryGenre"),
+        "country": base.get("country"),
+
+        # ---- Lookup 扩展字段 ----
+        "genres": ";".join(item.get("genres", [])),
+        "description": item.get("description"),
+        "version": item.get("version"),
+        "releaseNotes": item.get("releaseNotes"),
+        "supportedDevices": ";".join(item.get("supportedDevices", [])),
+        "minimumOsVersion": item.get("minimumOsVersion"),
+        "languages": ";".join(item.get("languageCodesISO2A", [])),
+        "lookupCountry": country,
+    }
+
 
 # ======================================================
-# 3. 主流程
+# 4. 主流程
 # ======================================================
 
-def enrich_with_description():
+def enrich_with_description(max_workers=MAX_WORKERS, batch_size=BATCH_SIZE):
     # ---------- 读取 Search 阶段结果 ----------
+    # 编码自动探测；无法无损解码时用替换字符，不再静默丢字节
+    encoding, errors = sniff_encoding(INPUT_FILE)
     with open(
         INPUT_FILE,
         newline="",
-        encoding="utf-8",
-        errors="ignore"
+        encoding=encoding,
+        errors=errors
     ) as f:
         reader = csv.DictReader(f)
         rows = list(reader)
@@ -60,84 +208,116 @@ def enrich_with_description():
 
     for row in rows:
         tid = row.get("trackId")
-        if tid:
+        if tid and tid not in base_info:
             base_info[tid] = row
             track_ids.append(tid)
 
     print(f"Valid trackIds: {len(track_ids)}")
 
-    enriched = []
-    failed = 0
+    # ---------- 按发现时的 storefront 分组切批 ----------
+    home_country = {}
+    groups = {}
+    for tid in track_ids:
+        country = (base_info[tid].get("country") or DEFAULT_COUNTRY).strip().lower()
+        home_country[tid] = country
+        groups.setdefault(country, []).append(tid)
 
-    # ---------- 批量 Lookup ----------
-    for i in range(0, len(track_ids), BATCH_SIZE):
-        batch = track_ids[i:i + BATCH_SIZE]
+    jobs = [
+        job
+        for country, ids in groups.items()
+        for job in split_batches(country, ids, batch_size)
+    ]
+    print("Storefronts: " + ", ".join(f"{c}={len(ids)}" for c, ids in groups.items()))
 
-        try:
-            results = lookup_by_track_ids(batch)
-
-            # Lookup 返回的是一个 list，需要按 trackId 对齐
-            for item in results:
-                tid = str(item.get("trackId"))
-                if tid not in base_info:
-                    continue
-
-                base = base_info[tid]
-
-                enriched.append({
-                    # ---- 原始字段 ----
-                    "trackId": tid,
-                    "bundleId": base.get("bundleId"),
-                    "trackName": base.get("trackName"),
-                    "sellerName": base.get("sellerName"),
-                    "primaryGenre": base.get("primaryGenre"),
-                    "country": base.get("country"),
-
-                    # ---- Lookup 扩展字段 ----
-                    "genres": ";".join(item.get("genres", [])),
-                    "description": item.get("description"),
-                    "version": item.get("version"),
-                    "releaseNotes": item.get("releaseNotes"),
-                    "supportedDevices": ";".join(item.get("supportedDevices", [])),
-                    "minimumOsVersion": item.get("minimumOsVersion"),
-                    "languages": ";".join(item.get("languageCodesISO2A", [])),
-                })
-
-            print(f"Lookup {i + 1}–{i + len(batch)} OK")
-
-            time.sleep(RATE_LIMIT_SECONDS)
+    outcome = BatchOutcome()
+    out = None
+    writer = None
 
-        except Exception as e:
-            failed += len(batch)
-            print(f"[ERROR] Batch {i}-{i+len(batch)}: {e}", file=sys.stderr)
-            time.sleep(10)
+    def absorb(result):
+        outcome.merge(result)
+        for err in result.errors:
+            print(f"[ERROR] {err}", file=sys.stderr)
+
+    def write_row(tid):
+        nonlocal out, writer
+        if writer is None:
+            out = open(OUTPUT_FILE, "w", newline="", encoding="utf-8")
+            writer = csv.DictWriter(out, fieldnames=ENRICHED_FIELDS)
+            writer.writeheader()
+        writer.writerow(build_row(base_info[tid], outcome.items[tid], outcome.countries[tid]))
 
-    # ---------- 保存 ----------
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        # ---------- 主查询：各 storefront 并发 Lookup，按输入顺序边返回边写出 ----------
+        future_of = {}
+        for job in jobs:
+            future = executor.submit(lookup_job, job)
+            for tid in job[1]:
+                future_of[tid] = future
+
+        absorbed = set()
+        empty = []          # 主查询返回为空（非失败）的 id，按输入顺序
+        for n, tid in enumerate(track_ids, 1):
+            future = future_of[tid]
+            if future not in absorbed:
+                absorbed.add(future)
+                absorb(future.result())
+
+            if tid in outcome.items:
+                write_row(tid)
+            elif tid not in outcome.failed:
+                empty.append(tid)
+
+            if n % batch_size == 0 or n == len(track_ids):
+                if out is not None:
+                    out.flush()
+                print(f"Lookup {n}/{len(track_ids)} done ({len(outcome.items)} enriched)")
+
+        # ---------- 补查：汇总所有批次里返回为空的 id，按 FALLBACK_COUNTRIES 顺序
+        # 逐个 storefront 整批补查；查到的行每批返回即追加写出（排在主查询结果之后） ----------
+        for fallback in FALLBACK_COUNTRIES:
+            missing = [
+                tid for tid in empty
+                if tid not in outcome.items and tid not in outcome.failed
+                and home_country[tid] != fallback
+            ]
+            if not missing:
+                continue
+            RETRY_POLICY.stats.incr("fallback_ids", len(missing))
+            fallback_jobs = split_batches(fallback, missing, batch_size)
+            for (_, batch), result in zip(fallback_jobs, executor.map(lookup_job, fallback_jobs)):
+                absorb(result)
+                for tid in batch:
+                    if tid in result.items:
+                        write_row(tid)
+                if out is not None:
+                    out.flush()
+            print(f"Fallback {fallback}: {len(missing)} ids, {len(fallback_jobs)} batches")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if out is not None:
+            out.close()
+
+    enriched = len(outcome.items)
+    failed = len(outcome.failed - outcome.items.keys())
+    not_found = len(track_ids) - enriched - failed
+
+    # ---------- 汇总 ----------
     if not enriched:
         print("No data enriched, abort.")
         return
 
-    fieldnames = enriched[0].keys()
-
-    with open(
-        OUTPUT_FILE,
-        "w",
-        newline="",
-        encoding="utf-8"
-    ) as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in enriched:
-            writer.writerow(row)
-
     print("\n=== Lookup Summary ===")
     print(f"Input apps      : {len(track_ids)}")
-    print(f"Enriched apps   : {len(enriched)}")
+    print(f"Enriched apps   : {enriched}")
+    print(f"Not found       : {not_found}")
     print(f"Failed lookups  : {failed}")
+    print(f"Retry stats     : {RETRY_POLICY.stats.summary()}")
     print(f"Saved to        : {OUTPUT_FILE}")
+    print(f"HTTP cache      : {RESPONSE_CACHE.hits} hits, {RESPONSE_CACHE.misses} misses")
 
 # ======================================================
-# 4. Entry
+# 5. Entry
 # ======================================================
 
 if __name__ == "__main__":
@@ -1,35 +1,24 @@
 import pandas as pd
-import unicodedata
-import re
-
-# ---------- 标题规范化函数 ----------
-def normalize(text):
-    if text is None:
-        return ""
-    text = str(text)
-    # 去 BOM、换行
-    text = text.replace("\ufeff", "").replace("\r", "").replace("\n", "")
-    # Unicode 规范化（全角半角、兼容字符）
-    text = unicodedata.normalize("NFKC", text)
-    # 去 Excel 常见引号
-    text = text.strip().strip('"').strip("'")
-    # 去不可见空白字符
-    text = re.sub(r"[\u00a0\u200b\u200e\u200f]", "", text)
-    # 多空格压缩为一个
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+
+from data_loader import PARQUET_AVAILABLE, read_table
+from dataset_store import DatasetStore
+from fuzzy_index import FuzzyTitleIndex, match_leftovers
+# 标题规范化：与原逐行 normalize 结果一致，批量 + 缓存
+from title_normalize import normalize, normalize_series  # noqa: F401
+
+# 精确匹配之后，对剩余 title 做近似匹配，输出候选及置信度
+FUZZY_OUTPUT = "target_fuzzy_candidates.csv"
+FUZZY_TOP_K = 3
+FUZZY_MIN_SCORE = 0.6
 
 # ---------- 读取 all_cleaned.csv ----------
-df_all = pd.read_csv(
-    "all_cleaned.csv",
-    encoding="latin1",      # 防止 UTF-8 解码失败
-    engine="python"
-)
-df_all['__title_norm__'] = df_all['title'].apply(normalize)
+# 编码自动探测（不再按 latin1 把中文读成乱码），二次读取命中 Parquet 缓存
+df_all = read_table("all_cleaned.csv")
+df_all['__title_norm__'] = normalize_series(df_all['title'])
 
 # ---------- 读取 Excel target.xlsx ----------
 df_target = pd.read_excel("target.xlsx", engine="openpyxl")
-df_target['__title_norm__'] = df_target['title'].apply(normalize)
+df_target['__title_norm__'] = normalize_series(df_target['title'])
 
 # ---------- 标记匹配 ----------
 df_merged = pd.merge(
@@ -69,6 +58,30 @@ df_unmatched.to_csv(
     encoding="utf-8-sig"
 )
 
+# 未匹配部分同时写入列式 store，match_app_store.py 从 store 读取
+if PARQUET_AVAILABLE:
+    DatasetStore().write("target_match", df_unmatched, "unmatched", source="target_unmatched_only.csv")
+
+# ---------- 剩余 title 近似匹配 ----------
+fuzzy_index = FuzzyTitleIndex(None if pd.isna(t) else t for t in df_all['title'])
+leftover_titles = df_unmatched['title_target'].dropna().drop_duplicates()
+fuzzy_rows = match_leftovers(leftover_titles, fuzzy_index, k=FUZZY_TOP_K, min_score=FUZZY_MIN_SCORE)
+
+df_fuzzy = pd.DataFrame(
+    [
+        {
+            "title_target": r["query"],
+            "rank": r["rank"],
+            "title_all": r["candidate"],
+            "pkg_name": df_all['pkg_name'].iloc[r["position"]] if 'pkg_name' in df_all else None,
+            "match_confidence": r["match_confidence"],
+        }
+        for r in fuzzy_rows
+    ],
+    columns=["title_target", "rank", "title_all", "pkg_name", "match_confidence"]
+)
+df_fuzzy.to_csv(FUZZY_OUTPUT, index=False, encoding="utf-8-sig")
+
 # ---------- 输出统计 ----------
 total_rows = len(df_target)
 matched_count = len(df_matched)
@@ -78,3 +91,4 @@ print("匹配完成")
 print("target 总行数:", total_rows)
 print("匹配到的行数:", matched_count)
 print("未匹配到的行数:", unmatched_count)
+print("近似匹配到候选的 title 数:", df_fuzzy['title_target'].nunique(), f"（见 {FUZZY_OUTPUT}）")
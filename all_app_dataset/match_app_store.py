@@ -1,16 +1,21 @@
 import pandas as pd
 
-# ---------- 读取数据 ----------
-app_df = pd.read_csv(
-    "embodied_intelligence_app_candidates.csv",
-    encoding="latin1",
-    engine="python"
-)
+from dataset_store import DatasetStore
+from fuzzy_index import FuzzyTitleIndex, match_leftovers
 
-target_df = pd.read_csv(
-    "target_unmatched_only.csv",
-    encoding="utf-8-sig"
+# 仍未匹配的 title 做近似匹配，输出候选及置信度
+FUZZY_OUTPUT = "target_fuzzy_from_unmatched.csv"
+FUZZY_TOP_K = 3
+FUZZY_MIN_SCORE = 0.6
+
+# ---------- 读取数据 ----------
+# 优先从列式 store 只读需要的列，没有时回退读 CSV
+store = DatasetStore()
+app_df = store.read_or_csv(
+    "candidates", "raw", "embodied_intelligence_app_candidates.csv",
+    columns=["trackId", "trackName"]
 )
+target_df = store.read_or_csv("target_match", "unmatched", "target_unmatched_only.csv")
 
 # ---------- 类型统一 ----------
 app_df["trackName"] = app_df["trackName"].astype(str)
@@ -36,8 +41,31 @@ target_unmatched_df.to_csv(
     encoding="utf-8-sig"
 )
 
+# ---------- 仍未匹配的 title 近似匹配 ----------
+fuzzy_index = FuzzyTitleIndex(app_df["trackName"])
+fuzzy_rows = match_leftovers(
+    target_unmatched_df["title_target"].drop_duplicates(),
+    fuzzy_index, k=FUZZY_TOP_K, min_score=FUZZY_MIN_SCORE
+)
+
+fuzzy_df = pd.DataFrame(
+    [
+        {
+            "title_target": r["query"],
+            "rank": r["rank"],
+            "trackName": r["candidate"],
+            "trackId": app_df["trackId"].iloc[r["position"]] if "trackId" in app_df else None,
+            "match_confidence": r["match_confidence"],
+        }
+        for r in fuzzy_rows
+    ],
+    columns=["title_target", "rank", "trackName", "trackId", "match_confidence"]
+)
+fuzzy_df.to_csv(FUZZY_OUTPUT, index=False, encoding="utf-8-sig")
+
 # ---------- 输出统计 ----------
 print("target_unmatched_only 再匹配完成")
 print("target 总行数:", len(target_df))
 print("新匹配到的行数:", len(target_matched_df))
 print("仍未匹配的行数:", len(target_unmatched_df))
+print("近似匹配到候选的 title 数:", fuzzy_df["title_target"].nunique(), f"（见 {FUZZY_OUTPUT}）")
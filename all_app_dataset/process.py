@@ -1,10 +1,7 @@
-import pandas as pd
-import io
+from data_loader import read_table
 
-with open("all.csv", "rb") as f:
-    text = f.read().decode("utf-8", errors="ignore")
-
-df = pd.read_csv(io.StringIO(text))
+# 编码自动探测，不再 errors="ignore" 丢字节
+df = read_table("all.csv")
 
 df = df[df['title'].notna()]
 df = df[df['title'].astype(str).str.strip() != ""]
@@ -0,0 +1,140 @@
+import json
+import os
+import re
+import unicodedata
+
+# ======================================================
+# 查询规划器
+# 1. 关键词规范化 + 去重（"Jetson"/"jetson"、重复的 "ros" 等）
+# 2. 记录每个 (term, country) 历次爬取带来的新 app 数
+# 3. 最近几次几乎没有新增的组合：跳过或排到最后
+#    被跳过若干次后重新探测一次，避免永久丢弃
+# ======================================================
+
+# 最近 YIELD_WINDOW 次新增都低于 MIN_NEW_APPS 视为低产
+YIELD_WINDOW = 3
+MIN_NEW_APPS = 1
+# 每条组合最多保留的历史记录数
+HISTORY_SIZE = 10
+# 低产组合被跳过 PROBE_AFTER 次后重新请求一次
+PROBE_AFTER = 5
+
+
+def normalize_term(term):
+    """NFKC + 去首尾空白 + 压缩空白 + casefold（iTunes 搜索不区分大小写）"""
+    term = unicodedata.normalize("NFKC", str(term))
+    term = re.sub(r"\s+", " ", term).strip()
+    return term.casefold()
+
+
+def dedup_terms(terms):
+    """按规范化结果去重，保留第一次出现的写法和顺序"""
+    kept = []
+    index = {}
+    for term in terms:
+        key = normalize_term(term)
+        if not key:
+            continue
+        if key in index:
+            print(f"[planner] duplicate term '{term}' (same as '{index[key]}'), dropped")
+            continue
+        index[key] = term
+        kept.append(term)
+    return kept
+
+
+class QueryYieldLog:
+    """
+    JSON 文件：{"<country>\\t<term_norm>": {"history": [新增数, ...], "skipped": n}}
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pairs = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.pairs = json.load(f)
+
+    @staticmethod
+    def _key(country, term):
+        return f"{country}\t{normalize_term(term)}"
+
+    def entry(self, country, term):
+        return self.pairs.get(self._key(country, term), {"history": [], "skipped": 0})
+
+    def record(self, country, term, new_apps):
+        entry = self.entry(country, term)
+        history = (entry["history"] + [new_apps])[-HISTORY_SIZE:]
+        self.pairs[self._key(country, term)] = {"history": history, "skipped": 0}
+
+    def mark_skipped(self, country, term):
+        entry = self.entry(country, term)
+        self.pairs[self._key(country, term)] = {
+            "history": entry["history"],
+            "skipped": entry["skipped"] + 1,
+        }
+
+    def is_unproductive(self, country, term):
+        history = self.entry(country, term)["history"]
+        if len(history) < YIELD_WINDOW:
+            return False
+        return all(n < MIN_NEW_APPS for n in history[-YIELD_WINDOW:])
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.pairs, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+
+# ======================================================
+# 饱和查询的子查询生成：term + 后缀 / term + 分类词
+# ======================================================
+
+SUBQUERY_SUFFIXES = [
+    "app", "control", "controller", "remote", "smart",
+    "pro", "wifi", "bluetooth", "kit", "camera",
+]
+
+SUBQUERY_GENRES = [
+    "utilities", "education", "productivity",
+    "lifestyle", "business", "entertainment",
+]
+
+
+def subqueries(term):
+    """为一个结果被截断的宽泛词生成更窄的子查询（跳过 term 本身已包含的词）"""
+    tokens = set(normalize_term(term).split())
+    return [
+        f"{term} {word}"
+        for word in SUBQUERY_SUFFIXES + SUBQUERY_GENRES
+        if word not in tokens
+    ]
+
+
+def plan_queries(terms, countries, yield_log, mode="skip"):
+    """
+    返回本轮要请求的 [(country, term), ...]
+    mode="skip"         : 低产组合本轮不请求（到期的重新探测）
+    mode="deprioritize" : 低产组合全部排到最后
+    """
+    productive = []
+    unproductive = []
+    skipped = 0
+
+    for country in countries:
+        for term in terms:
+            if not yield_log.is_unproductive(country, term):
+                productive.append((country, term))
+            elif mode == "skip" and yield_log.entry(country, term)["skipped"] < PROBE_AFTER:
+                yield_log.mark_skipped(country, term)
+                skipped += 1
+            else:
+                unproductive.append((country, term))
+
+    print(
+        f"[planner] {len(productive)} productive, "
+        f"{len(unproductive)} low-yield queued last, "
+        f"{skipped} low-yield skipped"
+    )
+    return productive + unproductive
@@ -0,0 +1,56 @@
+import threading
+import time
+
+# ======================================================
+# 令牌桶限流器（多线程共享）
+# ======================================================
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶：
+    - rate     : 每秒补充的令牌数（如 20 次/分钟 → 20 / 60）
+    - capacity : 桶容量，即允许的最大突发请求数
+    所有 worker 共享同一个桶，保证总请求速率不超过 rate
+    """
+
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute, capacity=1):
+        return cls(requests_per_minute / 60.0, capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def pause(self, seconds):
+        """
+        被服务端限流时调用：seconds 秒内所有 worker 都拿不到令牌
+        多个 worker 同时触发时取最长的一次，不会叠加
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def acquire(self, tokens=1):
+        """阻塞直到取得令牌，返回本次等待的秒数"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
@@ -0,0 +1,135 @@
+import json
+
+import pandas as pd
+
+# ======================================================
+# 多商店数据合并引擎（result_analysis_google.py / result_analysis_AppStore.py 共用）
+# - 每个商店一个 Source：JSON 路径 + 声明式字段映射（Excel 列 -> JSON 字段）
+# - Excel 行按 str(title).strip() 与 JSON 的 title 精确匹配，整表向量化 left join
+# - 同一 Source 内同名 app 以最后出现的为准
+# - 多个 Source 按列表顺序决定优先级：一行由命中的最高优先级 Source 整体填充
+#   （映射的列全部覆盖，JSON 中缺失的字段填空）
+# ======================================================
+
+# 这些列可能写入文本，先转成 object
+TEXT_COLUMNS = ["description", "released", "lastUpdatedOn", "url", "version"]
+
+TITLE_COLUMN = "title"
+_KEY = "__title_key__"
+
+
+class Source:
+    """
+    name        : 统计输出用的名字
+    path        : JSON 文件（对象或对象列表）
+    field_map   : {Excel 列: JSON 字段}，JSON 字段为 None 表示该商店没有此字段（填空）
+    title_field : JSON 中用于匹配的标题字段
+    keep_empty_title : 是否保留标题为空字符串的 app（可匹配标题为空白的行）
+    """
+
+    def __init__(self, name, path, field_map, title_field="title", keep_empty_title=False):
+        self.name = name
+        self.path = path
+        self.field_map = field_map
+        self.title_field = title_field
+        self.keep_empty_title = keep_empty_title
+
+    def load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return [data]
+        elif isinstance(data, list):
+            return data
+        else:
+            raise ValueError(f"JSON 格式不正确: {self.path}")
+
+    def frame(self, apps):
+        """按标题去重（最后出现的为准）的字段表，index 为标题"""
+        rows = []
+        for app in apps:
+            if not isinstance(app, dict):
+                continue
+            title = app.get(self.title_field)
+            if not isinstance(title, str) or (title == "" and not self.keep_empty_title):
+                continue
+            row = {_KEY: title}
+            for col, field in self.field_map.items():
+                row[col] = app.get(field) if field is not None else None
+            rows.append(row)
+
+        frame = pd.DataFrame(rows, columns=[_KEY, *self.field_map], dtype=object)
+        return frame.drop_duplicates(_KEY, keep="last").set_index(_KEY)
+
+
+def load_excel(path):
+    df = pd.read_excel(path)
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("object")
+    return df
+
+
+def title_keys(df):
+    if TITLE_COLUMN not in df.columns:
+        return pd.Series("None", index=df.index, dtype=object)
+    return df[TITLE_COLUMN].map(lambda v: str(v).strip()).astype(object)
+
+
+def enrich(df, sources):
+    """
+    用 sources（按优先级从高到低）填充 df，原地修改
+    返回 (被填充的行数, 每个 Source 的统计)
+    """
+    keys = title_keys(df)
+    filled = pd.Series(False, index=df.index)
+    stats = []
+
+    for source in sources:
+        apps = source.load()
+        frame = source.frame(apps)
+        matched = keys.isin(frame.index)
+        take = matched & ~filled
+
+        if take.any():
+            values = frame.reindex(keys[take])
+            for col in frame.columns:
+                if col in df.columns:
+                    if df[col].dtype != object:
+                        df[col] = df[col].astype(object)
+                    df.loc[take, col] = values[col].to_numpy(dtype=object)
+        filled |= take
+
+        stats.append({
+            "source": source.name,
+            "apps": len(apps),
+            "unique_titles": len(frame),
+            "rows_matched": int(matched.sum()),
+            "rows_filled": int(take.sum()),
+        })
+
+    # 只含数字的列恢复为数值类型
+    for col in df.columns:
+        if col not in TEXT_COLUMNS and df[col].dtype == object:
+            df[col] = df[col].infer_objects()
+
+    return int(filled.sum()), stats
+
+
+def print_stats(stats, total_rows):
+    print(f"{'source':<14} {'apps':>7} {'titles':>7} {'matched':>8} {'filled':>7}")
+    for s in stats:
+        print(f"{s['source']:<14} {s['apps']:>7} {s['unique_titles']:>7} "
+              f"{s['rows_matched']:>8} {s['rows_filled']:>7}")
+    print(f"Excel 总行数：{total_rows}")
+
+
+def run(excel_path, sources, output_path):
+    df = load_excel(excel_path)
+    filled, stats = enrich(df, sources)
+    df.to_excel(output_path, index=False)
+
+    print(f"处理完成：已生成 {output_path}")
+    print(f"成功匹配并填充的条目数：{filled}")
+    print_stats(stats, len(df))
+    return df
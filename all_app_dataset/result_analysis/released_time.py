@@ -1,27 +1,137 @@
+import re
+from datetime import datetime
+
 import pandas as pd
 
-# 1. 读取 CSV 文件
-df = pd.read_excel("output.xlsx")
-
-# 2. 定义时间解析函数
-def parse_to_year_month(x):
-    if pd.isna(x):
-        return None
-    try:
-        # pandas 自动识别多种日期格式
-        dt = pd.to_datetime(x, errors="coerce", utc=True)
-        if pd.isna(dt):
-            return None
-        return dt.strftime("%Y-%m")
-    except Exception:
-        return None
-
-# 3. 对 released 字段进行格式化
-df["released_ym"] = df["released"].apply(parse_to_year_month)
-
-# 4. （可选）查看无法解析的记录
-invalid_rows = df[df["released_ym"].isna()]
-print(f"无法解析的日期数量：{len(invalid_rows)}")
-
-# 5. 保存结果
-df.to_csv("putput_datatime.csv", index=False)
+INPUT_PATH = "output.xlsx"
+OUTPUT_PATH = "putput_datatime.csv"
+
+# ======================================================
+# released 日期规范化为 "YYYY-MM"
+# 不同来源的格式族分别用显式格式一次性向量化解析：
+#   google_play : "Mar 3, 2019"
+#   app_store   : ISO 8601，如 "2019-03-03T08:00:00Z"（统一换算到 UTC）
+#   excel       : Excel 读出的日期单元格（datetime）
+#   excel_serial: Excel 日期序列号，如 43527
+#   other       : 其余字符串，逐个去重值交给 pandas 自动推断
+# 相同原始值只解析一次；无法解析的值按格式族汇总输出
+# ======================================================
+
+_GP_RE = re.compile(r"^[A-Za-z]{3} \d{1,2}, \d{4}$")
+_ISO_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_SERIAL_RE = re.compile(r"^\d{5}(\.\d+)?$")
+
+# Excel 序列号的合理范围（1954 ~ 2119 年）
+SERIAL_MIN, SERIAL_MAX = 20000, 80000
+EXCEL_EPOCH = "1899-12-30"
+
+FAMILY_FORMATS = {
+    "google_play": "%b %d, %Y",
+    "app_store": "ISO8601",
+}
+
+
+def format_family(value):
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return "excel"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return "excel_serial"
+    text = str(value).strip()
+    if _GP_RE.match(text):
+        return "google_play"
+    if _ISO_RE.match(text):
+        return "app_store"
+    if _SERIAL_RE.match(text):
+        return "excel_serial"
+    return "other"
+
+
+def _parse_family(family, values):
+    """values 为同一格式族的去重原始值，返回 UTC Timestamp 的 Series（无法解析为 NaT）"""
+    index = pd.Index(range(len(values)))
+    if family in FAMILY_FORMATS:
+        texts = pd.Series([str(v).strip() for v in values], index=index)
+        return pd.to_datetime(texts, format=FAMILY_FORMATS[family], errors="coerce", utc=True)
+    if family == "excel":
+        return pd.to_datetime(pd.Series(values, index=index, dtype=object), errors="coerce", utc=True)
+    if family == "excel_serial":
+        serials = pd.to_numeric(pd.Series(values, index=index, dtype=object), errors="coerce")
+        serials = serials.where((serials >= SERIAL_MIN) & (serials <= SERIAL_MAX))
+        return pd.to_datetime(serials, unit="D", origin=EXCEL_EPOCH, utc=True)
+    # other：逐个推断（与原实现一致），只对去重值调用
+    return pd.Series(
+        [pd.to_datetime(v, errors="coerce", utc=True) for v in values],
+        index=index, dtype="datetime64[ns, UTC]"
+    )
+
+
+def parse_released(series):
+    """
+    返回 (年月 Series，格式族统计)
+    年月为 "YYYY-MM"，空值 / 无法解析为 None
+    """
+    present = series[series.notna()]
+    codes, uniques = pd.factorize(present.astype(object), use_na_sentinel=False)
+
+    families = {}
+    for i, value in enumerate(uniques):
+        families.setdefault(format_family(value), []).append(i)
+
+    unique_ym = [None] * len(uniques)
+    stats = {}
+    for family, positions in families.items():
+        values = [uniques[i] for i in positions]
+        parsed = _parse_family(family, values)
+        ym = parsed.dt.strftime("%Y-%m")
+        failed = []
+        for pos, value, text in zip(positions, values, ym):
+            if isinstance(text, str):
+                unique_ym[pos] = text
+            else:
+                failed.append(value)
+        stats[family] = {"unique": len(values), "unparseable": failed}
+
+    # 按行数统计
+    family_of = {}
+    for family, positions in families.items():
+        for pos in positions:
+            family_of[pos] = family
+    for family in stats:
+        stats[family]["rows"] = 0
+        stats[family]["unparseable_rows"] = 0
+    for code in codes:
+        s = stats[family_of[code]]
+        s["rows"] += 1
+        if unique_ym[code] is None:
+            s["unparseable_rows"] += 1
+
+    result = pd.Series(None, index=series.index, dtype=object)
+    result.loc[present.index] = [unique_ym[c] for c in codes]
+    return result, stats
+
+
+def print_report(stats, missing):
+    print(f"{'family':<14} {'rows':>6} {'unique':>7} {'unparseable':>12}")
+    for family, s in stats.items():
+        print(f"{family:<14} {s['rows']:>6} {s['unique']:>7} {s['unparseable_rows']:>12}")
+    print(f"{'(empty)':<14} {missing:>6}")
+    for family, s in stats.items():
+        if s["unparseable"]:
+            sample = ", ".join(repr(v) for v in s["unparseable"][:5])
+            print(f"[WARN] {family} unparseable values: {sample}")
+
+
+if __name__ == "__main__":
+    # 1. 读取合并后的表
+    df = pd.read_excel(INPUT_PATH)
+
+    # 2. 对 released 字段进行格式化
+    df["released_ym"], stats = parse_released(df["released"])
+
+    # 3. 查看无法解析的记录（按格式族）
+    invalid_rows = df[df["released_ym"].isna()]
+    print(f"无法解析的日期数量：{len(invalid_rows)}")
+    print_report(stats, int(df["released"].isna().sum()))
+
+    # 4. 保存结果
+    df.to_csv(OUTPUT_PATH, index=False)
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+from collections import Counter
+
+import pandas as pd
+
+# ======================================================
+# 统计立方体：category × store × country × year_month 的 APP 数
+# - 持久化两部分：每个 APP 落在哪个格子（rows），以及各格子的计数（counts）
+# - 增量构建：输入文件哈希不变时直接复用；变化时只对新增 / 变化 / 删除的行
+#   在 counts 上加减，不重新聚合整张表
+# - 所有图表只读 counts（几百个格子），不再重复读原始表
+# 输入表没有 store / country 列时，这两个维度记为 "unknown"
+# ======================================================
+
+INPUT_PATH = "putput_datatime.csv"
+CUBE_PATH = "report_cube.json"
+
+DIMENSIONS = ["category", "store", "country", "year_month"]
+UNKNOWN = "unknown"
+
+# 类别映射
+LABEL_MAP = {
+    1: "Cleaning Robots",
+    2: "Service Robots",
+    3: "Lawn Mowing Robots",
+    4: "Drones",
+    5: "Education & Companion Robots",
+    6: "Industrial & Agricultural",
+    7: "Wearable Devices",
+    8: "Embodied Intelligent Robots"
+}
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _column(df, name):
+    if name in df.columns:
+        return df[name].fillna(UNKNOWN).astype(str)
+    return pd.Series(UNKNOWN, index=df.index)
+
+
+def row_cells(df):
+    """
+    每行的 (row_key, [category, store, country, year_month])
+    没有年月或类别无法映射的行不进入立方体
+    row_key = title | store | country | 同名序号，保证同名 APP 各占一行
+    """
+    category = df["label"].map(LABEL_MAP)
+    store = _column(df, "store")
+    country = _column(df, "country")
+    title = df["title"].astype(str)
+    ym = df["released_ym"]
+
+    keys = title + "|" + store + "|" + country
+    occurrence = keys.groupby(keys).cumcount().astype(str)
+    keys = keys + "|" + occurrence
+
+    valid = category.notna() & ym.notna()
+    return {
+        key: [cat, st, co, y]
+        for key, cat, st, co, y in zip(
+            keys[valid], category[valid], store[valid], country[valid], ym[valid]
+        )
+    }
+
+
+class ReleaseCube:
+
+    def __init__(self, path=CUBE_PATH):
+        self.path = path
+        self.source_hash = None
+        self.rows = {}          # row_key -> [category, store, country, year_month]
+        self.counts = Counter()  # (category, store, country, year_month) -> APP 数
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.source_hash = data.get("source_hash")
+            self.rows = data.get("rows", {})
+            if "counts" in data:
+                self.counts = Counter({tuple(cell[:-1]): cell[-1] for cell in data["counts"]})
+            else:
+                # 旧格式只有 rows，补算一次
+                self.counts = Counter(tuple(cell) for cell in self.rows.values())
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        counts = [[*cell, n] for cell, n in sorted(self.counts.items())]
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"source_hash": self.source_hash, "counts": counts, "rows": self.rows},
+                      f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def _apply(self, old_cell, new_cell):
+        if old_cell is not None:
+            cell = tuple(old_cell)
+            self.counts[cell] -= 1
+            if not self.counts[cell]:
+                del self.counts[cell]
+        if new_cell is not None:
+            self.counts[tuple(new_cell)] += 1
+
+    def update(self, input_path=INPUT_PATH):
+        """
+        增量更新，返回 (新增, 变化, 删除) 行数；输入未变化时返回 None
+        """
+        digest = _file_hash(input_path)
+        if digest == self.source_hash:
+            return None
+
+        df = pd.read_csv(input_path)
+        unmapped = df.loc[df["label"].map(LABEL_MAP).isna(), "label"].unique()
+        if len(unmapped):
+            print(f"[WARN] unmapped labels: {list(unmapped)}")
+
+        new_rows = row_cells(df)
+        added = changed = removed = 0
+        for key, cell in new_rows.items():
+            old_cell = self.rows.get(key)
+            if old_cell is None:
+                added += 1
+                self._apply(None, cell)
+            elif old_cell != cell:
+                changed += 1
+                self._apply(old_cell, cell)
+        for key, old_cell in self.rows.items():
+            if key not in new_rows:
+                removed += 1
+                self._apply(old_cell, None)
+
+        self.rows = new_rows
+        self.source_hash = digest
+        self.save()
+        return added, changed, removed
+
+    def frame(self):
+        """立方体的格子表：DIMENSIONS + count（直接取持久化的计数）"""
+        return pd.DataFrame(
+            [(*cell, n) for cell, n in sorted(self.counts.items())],
+            columns=[*DIMENSIONS, "count"]
+        )
+
+
+def rollup(cube_frame, dims):
+    """按给定维度汇总 count"""
+    return cube_frame.groupby(dims, as_index=False)["count"].sum()
+
+
+if __name__ == "__main__":
+    cube = ReleaseCube()
+    result = cube.update()
+    if result is None:
+        print(f"{INPUT_PATH} unchanged, cube up to date ({len(cube.rows)} apps)")
+    else:
+        print(f"cube updated: +{result[0]} ~{result[1]} -{result[2]}, {len(cube.rows)} apps")
@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use("Agg")   # 非交互后端，无显示器也能批量出图
+
+import matplotlib.dates as mdates  # noqa: E402
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from report_cube import LABEL_MAP, rollup  # noqa: E402
+
+# ======================================================
+# 批量报表渲染：所有标准图表只基于立方体格子表绘制，
+# 每张图一个任务，多进程并行渲染
+# ======================================================
+
+OUTPUT_DIR = "."
+MAX_WORKERS = None      # None 为 CPU 核数
+CATEGORY_ORDER = list(LABEL_MAP.values())
+COLOR = "steelblue"
+
+
+def _month_dates(frame):
+    return pd.to_datetime(frame["year_month"], format="%Y-%m")
+
+
+def _facet_axes(n, col_wrap=4, height=3):
+    rows = max(1, -(-n // col_wrap))
+    fig, axes = plt.subplots(rows, col_wrap, figsize=(col_wrap * height, rows * height),
+                             sharex=True, sharey=True, squeeze=False)
+    axes = axes.flatten()
+    for ax in axes[n:]:
+        ax.set_visible(False)
+    return fig, axes
+
+
+def _label_facets(axes, n, xlabel, ylabel, col_wrap=4):
+    """
+    与 FacetGrid 一致：x 轴标签 / 刻度只加在每列最下面的格子（最后一行不满时
+    上一行的格子也算），y 轴标签只加在第一列
+    """
+    if n:
+        # 共享 x 轴，设置一次即可；格子较窄，刻度不超过 5 个以免重叠
+        axes[0].xaxis.set_major_locator(mdates.AutoDateLocator(minticks=3, maxticks=5))
+    for i, ax in enumerate(axes[:n]):
+        if i + col_wrap >= n:
+            ax.set_xlabel(xlabel)
+            ax.xaxis.set_tick_params(labelbottom=True)
+        if i % col_wrap == 0:
+            ax.set_ylabel(ylabel)
+
+
+def plot_category_hist(cube_frame, path):
+    """各类别发布时间分布（原 figure.py 的 datatime_figure.png）"""
+    data = rollup(cube_frame, ["category", "year_month"])
+    categories = [c for c in CATEGORY_ORDER if c in set(data["category"])]
+    fig, axes = _facet_axes(len(categories))
+    for ax, category in zip(axes, categories):
+        sub = data[data["category"] == category]
+        # 每个月的 APP 数作为权重，与按原始行画直方图结果相同
+        ax.hist(_month_dates(sub), bins=20, weights=sub["count"], color=COLOR)
+        ax.set_title(category)
+    _label_facets(axes, len(categories), "Released Time", "APP Count")
+    fig.subplots_adjust(top=0.88)
+    fig.suptitle("Released Time Distribution")
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_cumulative(cube_frame, path):
+    """各类别累计 APP 数"""
+    data = rollup(cube_frame, ["category", "year_month"])
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for category in CATEGORY_ORDER:
+        sub = data[data["category"] == category].sort_values("year_month")
+        if len(sub):
+            ax.step(_month_dates(sub), sub["count"].cumsum(), where="post", label=category)
+    ax.set_xlabel("Released Time")
+    ax.set_ylabel("Cumulative APP Count")
+    ax.set_title("Cumulative Released APPs by Category")
+    ax.legend(fontsize=7)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+# 输出文件名 -> 绘图函数
+# 输入表还没有 store / country 列（立方体中恒为 unknown），暂不出按商店 / 国家的图
+FIGURES = {
+    "datatime_figure.png": plot_category_hist,
+    "cumulative_by_category.png": plot_cumulative,
+}
+
+
+def _render(job):
+    name, cube_frame, output_dir = job
+    path = os.path.join(output_dir, name)
+    FIGURES[name](cube_frame, path)
+    return path
+
+
+def render_all(cube_frame, names=None, output_dir=OUTPUT_DIR, max_workers=MAX_WORKERS):
+    """并行渲染 names（默认全部）中的图表，返回生成的文件路径（按 names 顺序）"""
+    names = list(names or FIGURES)
+    jobs = [(name, cube_frame, output_dir) for name in names]
+    if max_workers == 1 or len(jobs) <= 1:
+        return [_render(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_render, jobs))
@@ -0,0 +1,152 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+# ======================================================
+# 共享重试策略（search / lookup 共用）
+# 区分错误类型：
+#   throttled    : HTTP 429，优先遵守 Retry-After，并暂停共享令牌桶
+#   forbidden    : HTTP 403（Apple 限流时常返回 403），较长退避
+#   server_error : HTTP 5xx，指数退避
+#   timeout / connection : 网络抖动，短暂等待后立即重试
+#   其他错误（4xx、解析失败、CacheMiss 等）不重试
+# ======================================================
+
+RETRYABLE_KINDS = ("throttled", "forbidden", "server_error", "timeout", "connection")
+
+
+def classify_error(exc):
+    if isinstance(exc, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        return "connection"
+    if isinstance(exc, requests.exceptions.HTTPError):
+        status = getattr(exc.response, "status_code", None)
+        if status == 429:
+            return "throttled"
+        if status == 403:
+            return "forbidden"
+        if status is not None and status >= 500:
+            return "server_error"
+        return "client_error"
+    return "other"
+
+
+def parse_retry_after(exc):
+    """读取 Retry-After（秒数或 HTTP 日期），没有则返回 None"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryStats:
+    """线程安全的计数器：按错误类型统计，以及重试 / 放弃次数"""
+
+    STANDARD = (
+        "throttled", "forbidden", "server_error", "timeout", "connection",
+        "retries", "requeued", "gave_up",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def get(self, name):
+        return self.counts.get(name, 0)
+
+    def summary(self):
+        return (
+            f"throttled(429)={self.get('throttled')} "
+            f"forbidden(403)={self.get('forbidden')} "
+            f"5xx={self.get('server_error')} "
+            f"timeouts={self.get('timeout') + self.get('connection')} "
+            f"retries={self.get('retries')} "
+            f"requeued={self.get('requeued')} "
+            f"gave_up={self.get('gave_up')}"
+        ) + "".join(
+            f" {name}={n}"
+            for name, n in sorted(self.counts.items())
+            if name not in self.STANDARD and n
+        )
+
+
+class RetryPolicy:
+
+    def __init__(
+        self,
+        max_attempts=4,
+        base_delay=2.0,
+        max_delay=120.0,
+        forbidden_delay=30.0,
+        network_delay=0.5,
+        limiter=None,
+        classify=classify_error
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.forbidden_delay = forbidden_delay
+        self.network_delay = network_delay
+        self.limiter = limiter       # 共享 TokenBucket（fn 内部 acquire），被限流时整体暂停
+        self.classify = classify     # 异常 -> 错误类型，非 requests 的客户端可传入自己的分类
+        self.stats = RetryStats()
+
+    def is_retryable(self, exc):
+        return self.classify(exc) in RETRYABLE_KINDS
+
+    def backoff(self, kind, attempt, retry_after=None):
+        """
+        带随机抖动的指数退避（不超过 max_delay）；
+        429 有 Retry-After 时按服务端给的时间等待，不截断，提前重试只会再次被限流
+        """
+        if retry_after is not None:
+            return retry_after
+        if kind in ("timeout", "connection"):
+            base = self.network_delay
+        elif kind == "forbidden":
+            base = self.forbidden_delay
+        else:
+            base = self.base_delay
+        cap = min(self.max_delay, base * (2 ** (attempt - 1)))
+        return random.uniform(cap / 2, cap)
+
+    def call(self, fn, *args, **kwargs):
+        """
+        执行 fn，可重试错误按策略退避重试；
+        不可重试或重试用尽时抛出最后一次异常，由调用方决定是否重新入队
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                kind = self.classify(e)
+                self.stats.incr(kind)
+                if kind not in RETRYABLE_KINDS or attempt >= self.max_attempts:
+                    raise
+
+                delay = self.backoff(kind, attempt, parse_retry_after(e))
+                self.stats.incr("retries")
+                if self.limiter is not None and kind in ("throttled", "forbidden"):
+                    # 暂停共享令牌桶：fn 重试时会在 acquire 处等待，这里不再重复 sleep
+                    self.limiter.pause(delay)
+                else:
+                    time.sleep(delay)
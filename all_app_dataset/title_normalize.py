@@ -0,0 +1,81 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+# ======================================================
+# APP 标题规范化 / 相似度（匹配、搜索重排共用）
+# ======================================================
+
+# 预编译的删除表：BOM / 换行，以及 NFKC 之后的不可见空白字符
+_BOM_NEWLINE_TABLE = str.maketrans("", "", "\ufeff\r\n")
+_INVISIBLE_TABLE = str.maketrans("", "", "\u00a0\u200b\u200e\u200f")
+_SPACES_RE = re.compile(r"\s+")
+# 相似度比较时去掉标点符号，保留字母数字和 CJK
+_PUNCT_RE = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+def normalize(text):
+    if text is None:
+        return ""
+    text = str(text)
+    # 去 BOM、换行
+    text = text.translate(_BOM_NEWLINE_TABLE)
+    # Unicode 规范化（全角半角、兼容字符）
+    text = unicodedata.normalize("NFKC", text)
+    # 去 Excel 常见引号
+    text = text.strip().strip('"').strip("'")
+    # 去不可见空白字符
+    text = text.translate(_INVISIBLE_TABLE)
+    # 多空格压缩为一个
+    text = _SPACES_RE.sub(" ", text)
+    return text.strip()
+
+
+# 批量规范化的缓存：原始字符串 -> 规范化结果（多次调用 / 多个表之间共享）
+_NORMALIZE_CACHE = {}
+
+
+def normalize_series(series):
+    """
+    对 pandas Series 批量规范化，结果与 series.apply(normalize) 逐字节一致：
+    None -> ""，NaN -> "nan"，其余先 str()
+    只对缓存中没有的去重值做一次向量化字符串运算，再按位置映射回去
+    """
+    import numpy as np
+    import pandas as pd
+
+    values = ["" if v is None else str(v) for v in series.to_numpy(dtype=object)]
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+
+    missing = [u for u in uniques if u not in _NORMALIZE_CACHE]
+    if missing:
+        s = pd.Series(missing, dtype=object)
+        s = (
+            s.str.translate(_BOM_NEWLINE_TABLE)
+            .str.normalize("NFKC")
+            .str.strip().str.strip('"').str.strip("'")
+            .str.translate(_INVISIBLE_TABLE)
+            .str.replace(_SPACES_RE, " ", regex=True)
+            .str.strip()
+        )
+        _NORMALIZE_CACHE.update(zip(missing, s.tolist()))
+
+    normalized = np.array([_NORMALIZE_CACHE[u] for u in uniques], dtype=object)
+    return pd.Series(normalized[codes], index=series.index, dtype=object)
+
+
+def title_key(text):
+    """用于模糊比较的 key：normalize + casefold + 去标点"""
+    text = normalize(text).casefold()
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def title_similarity(a, b):
+    """0~1 的标题相似度（基于 title_key 的 SequenceMatcher）"""
+    a, b = title_key(a), title_key(b)
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
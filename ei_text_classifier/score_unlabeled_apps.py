@@ -3,10 +3,13 @@ import sys
 import joblib
 import torch
 import numpy as np
-import pandas as pd
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 
+# 共用的表格读取（编码探测 + Parquet 缓存）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "all_app_dataset"))
+from data_loader import read_table  # noqa: E402
+
 # =====================
 # Command-line arguments
 # =====================
@@ -30,12 +33,7 @@ os.makedirs("outputs", exist_ok=True)
 # =====================
 print(f"Loading unlabeled dataset from {DATA_PATH}...")
 
-df = pd.read_csv(
-    DATA_PATH,
-    encoding="latin1",
-    engine="python",
-    on_bad_lines="skip"
-)
+df = read_table(DATA_PATH, on_bad_lines="skip")
 
 df.columns = ["title", "description"]
 df["title"] = df["title"].fillna("")